@@ -4,9 +4,9 @@ import asyncio
 import os
 from pathlib import Path
 
-from dotenv import load_dotenv
 from termcolor import colored
 
+from llm_agent._dotenv_cache import load_dotenv_cached
 from llm_agent.agent import Agent
 from llm_agent.callbacks import ConsoleApprovalCallback
 from llm_agent.config import AgentConfig, BreakpointConfig, DebugSettings
@@ -14,15 +14,22 @@ from llm_agent.debug import BreakpointType
 from llm_agent.logging import LogConfig, TyperLogger
 from llm_agent.state.config import StateStorageConfig
 
-load_dotenv()
+try:
+    import uvloop
+except ImportError:  # pragma: no cover - uvloop is unavailable on Windows
+    uvloop = None
+
+load_dotenv_cached()
 
 
 async def main() -> None:
     """Run a simple task with enhanced debugging"""
+    cwd = Path.cwd()
+
     # Configure logging with TyperLogger
     log_config = LogConfig(
         level="DEBUG",
-        file_path=Path.cwd() / ".llm_agent" / "logs" / "agent.log",
+        file_path=cwd / ".llm_agent" / "logs" / "agent.log",
         console_logging=True,
         file_logging=True,
         use_colors=True,
@@ -50,7 +57,7 @@ async def main() -> None:
         llm_provider="openai",
         api_key=os.environ["OPENAI_API_KEY"],
         base_url=os.environ["OPENAI_BASE_URL"],
-        working_directory=Path.cwd(),
+        working_directory=cwd,
         state_storage=StateStorageConfig(
             type="json",
             auto_checkpoint=True,
@@ -66,55 +73,55 @@ async def main() -> None:
     # Create a custom approval callback
     approval_callback = ConsoleApprovalCallback()
 
-    # Initialize agent with the callback
-    agent = Agent(config, approval_callback=approval_callback)
-
-    logger.show_panel("Starting Task Sequence", "Initializing task execution", style="yellow")
-
-    setup_task = """Write a python script to draw a circle with random radius from 1 to 10
-    """
+    # Initialize agent with the callback; it is closed once all tasks have run
+    async with Agent(config, approval_callback=approval_callback) as agent:
+        logger.show_panel("Starting Task Sequence", "Initializing task execution", style="yellow")
 
-    logger.start_task("Executing Setup Task...")
-    result = await agent.execute_task(setup_task)
-    logger.end_task("Setup Task Completed", success=True)
-    logger.show_panel("Task Result", str(result), style="green")
+        setup_task = """Write a python script to draw a circle with random radius from 1 to 10
+        """
 
-    # Demonstrate memory features
-    logger.show_panel("Memory Features", "Demonstrating task history and related tasks", style="cyan")
+        logger.start_task("Executing Setup Task...")
+        result = await agent.execute_task(setup_task)
+        logger.end_task("Setup Task Completed", success=True)
+        logger.show_panel("Task Result", str(result), style="green")
 
-    logger.start_task("Searching Task History...")
-    history = await agent.search_task_history("CSV")
-    logger.end_task("Task History Search Complete", success=True)
+        # Demonstrate memory features
+        logger.show_panel("Memory Features", "Demonstrating task history and related tasks", style="cyan")
 
-    for task in history:
-        logger.show_table(
-            "Found Task",
-            {
-                "Description": task["task"],
-                "Relevance": task["relevance"],
-                "Status": "Completed" if task["completed"] else "In Progress",
-            },
+        logger.start_task("Searching Task History and Related Tasks...")
+        history, related = await asyncio.gather(
+            agent.search_task_history("CSV"),
+            agent.get_related_tasks(limit=3),
         )
+        logger.end_task("Task History and Related Tasks Retrieved", success=True)
+
+        for task in history:
+            logger.show_table(
+                "Found Task",
+                {
+                    "Description": task["task"],
+                    "Relevance": task["relevance"],
+                    "Status": "Completed" if task["completed"] else "In Progress",
+                },
+            )
 
-    logger.start_task("Getting Related Tasks...")
-    related = await agent.get_related_tasks(limit=3)
-    logger.end_task("Related Tasks Retrieved", success=True)
-
-    for task in related:
-        status = "Completed" if task["completed"] else "In Progress"
-        logger.show_table(
-            "Related Task",
-            {
-                "Description": task["task"],
-                "Similarity": f"{task['similarity']:.2f}",
-                "Status": status,
-            },
-        )
+        for task in related:
+            status = "Completed" if task["completed"] else "In Progress"
+            logger.show_table(
+                "Related Task",
+                {
+                    "Description": task["task"],
+                    "Similarity": f"{task['similarity']:.2f}",
+                    "Status": status,
+                },
+            )
 
-    logger.show_panel("Task Complete", "All operations finished successfully", style="green")
+        logger.show_panel("Task Complete", "All operations finished successfully", style="green")
 
 
 if __name__ == "__main__":
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -8,6 +8,11 @@ from termcolor import colored
 from llm_agent.agent import Agent
 from llm_agent.config import AgentConfig
 
+try:
+    import uvloop
+except ImportError:  # pragma: no cover - uvloop is unavailable on Windows
+    uvloop = None
+
 
 async def main() -> None:
     """Run a task using YAML configuration"""
@@ -18,48 +23,53 @@ async def main() -> None:
     config_path = Path(__file__).parent.parent / "config.yaml"
     config = AgentConfig.from_yaml(str(config_path))
 
-    # Create agent instance
-    agent = Agent(config)
-
-    print(colored("\nStarting Task Sequence", "cyan"))
-    print("=" * 80)
-
-    # Example task
-    task = """Create a Python script that:
-    1. Reads a CSV file
-    2. Calculates the average of a numeric column
-    3. Writes the result to a new file
-    """
-
-    print(colored("\nExecuting Task...", "yellow"))
-    result = await agent.execute_task(task)
-    print(colored(f"Task Completed\nResult: {result}\n", "green"))
-
-    # Demonstrate memory features
-    print(colored("\nDemonstrating Memory Features", "cyan"))
-    print("=" * 80)
-
-    print("\nSearching Task History...")
-    history = await agent.search_task_history("CSV")
-    for task in history:
-        print(colored("\nFound Task:", "magenta"))
-        print(f"- Description: {task['task']}")
-        print(f"- Relevance: {task['relevance']}")
-        print(f"- Status: {'Completed' if task['completed'] else 'In Progress'}")
-
-    print("\nGetting Related Tasks...")
-    related = await agent.get_related_tasks(limit=3)
-    for task in related:
-        status = "Completed" if task["completed"] else "In Progress"
-        print(colored("\nRelated Task:", "magenta"))
-        print(f"- Description: {task['task']}")
-        print(f"- Similarity: {task['similarity']:.2f}")
-        print(f"- Status: {status}")
-
-    print("\nDone!")
+    # Create agent instance, closed once all tasks have run
+    async with Agent(config) as agent:
+        print(colored("\nStarting Task Sequence", "cyan"))
+        print("=" * 80)
+
+        # Example task
+        task = """Create a Python script that:
+        1. Reads a CSV file
+        2. Calculates the average of a numeric column
+        3. Writes the result to a new file
+        """
+
+        print(colored("\nExecuting Task...", "yellow"))
+        result = await agent.execute_task(task)
+        print(colored(f"Task Completed\nResult: {result}\n", "green"))
+
+        # Demonstrate memory features
+        print(colored("\nDemonstrating Memory Features", "cyan"))
+        print("=" * 80)
+
+        # The two lookups are independent, so issue them together
+        history, related = await asyncio.gather(
+            agent.search_task_history("CSV"),
+            agent.get_related_tasks(limit=3),
+        )
+
+        print("\nSearching Task History...")
+        for task in history:
+            print(colored("\nFound Task:", "magenta"))
+            print(f"- Description: {task['task']}")
+            print(f"- Relevance: {task['relevance']}")
+            print(f"- Status: {'Completed' if task['completed'] else 'In Progress'}")
+
+        print("\nGetting Related Tasks...")
+        for task in related:
+            status = "Completed" if task["completed"] else "In Progress"
+            print(colored("\nRelated Task:", "magenta"))
+            print(f"- Description: {task['task']}")
+            print(f"- Similarity: {task['similarity']:.2f}")
+            print(f"- Status: {status}")
+
+        print("\nDone!")
 
 
 if __name__ == "__main__":
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -2,8 +2,25 @@
 LLM Agent - A Python library for LLM-powered development assistance
 """
 
-from llm_agent.agent import Agent
-from llm_agent.config import AgentConfig
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from llm_agent.agent import Agent
+    from llm_agent.config import AgentConfig
 
 __version__ = "0.1.0"
 __all__ = ["Agent", "AgentConfig"]
+
+
+def __getattr__(name: str):
+    # Resolve the public classes on first access so that importing a submodule
+    # (e.g. from the CLI) does not pull in the whole agent and LLM stack
+    if name == "Agent":
+        from llm_agent.agent import Agent
+
+        return Agent
+    if name == "AgentConfig":
+        from llm_agent.config import AgentConfig
+
+        return AgentConfig
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
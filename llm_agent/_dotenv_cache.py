@@ -0,0 +1,31 @@
+"""
+Memoized .env loading
+"""
+
+import functools
+import os
+
+from dotenv import find_dotenv, load_dotenv
+
+
+@functools.lru_cache(maxsize=4)
+def _load_dotenv(path: str, mtime_ns: int) -> bool:
+    """Load a .env file, memoized on its path and modification time"""
+    return load_dotenv(path, override=False)
+
+
+def load_dotenv_cached() -> bool:
+    """
+    Load the nearest .env file into the environment, at most once per file version
+
+    The file is located from the current working directory. Existing environment
+    variables are never overridden, so repeat loads of an unchanged file are no-ops
+    and are skipped entirely.
+
+    Returns:
+        True if a .env file was found and loaded, False otherwise
+    """
+    path = find_dotenv(usecwd=True)
+    if not path:
+        return False
+    return _load_dotenv(path, os.stat(path).st_mtime_ns)
@@ -2,55 +2,119 @@
 Core Agent implementation
 """
 
+import asyncio
+import logging
+import os
 import sys
+import time
 import uuid
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Coroutine, Dict, List, Mapping, Optional, Sequence, Set, Tuple
 
 from .callbacks import ApprovalCallback, ConsoleApprovalCallback
 from .config import AgentConfig
 from .debug import BreakpointType, DebugCallback, DebugInfo, DebugSession
-from .llm.base import BaseLLMProvider
-from .logging import AgentLogger, TyperLogger
+from .llm import BatchingLLMProvider, release_llm_provider
+from .llm.base import BaseLLMProvider, ToolCall
+from .logging import TyperLogger, get_agent_logger
 from .state import TaskState
 from .state.storage import JsonStateStorage, SqliteStateStorage, StateStorage
 from .tools.base import BaseTool
 
+# Whether the process runs attached to a terminal; probed once rather than per Agent.
+# LLM_AGENT_CLI=1/0 forces it on or off (e.g. for batch runs) without probing.
+_CLI_MODE_OVERRIDE = os.environ.get("LLM_AGENT_CLI", "auto")
+if _CLI_MODE_OVERRIDE == "auto":
+    _IS_CLI_MODE = sys.stdin.isatty() and sys.stdout.isatty()
+else:
+    _IS_CLI_MODE = _CLI_MODE_OVERRIDE == "1"
+
+# Directories this process has already created, so repeat agents skip the mkdir calls
+_MKDIR_DONE: Set[Path] = set()
+
+
+def _ensure_dir(path: Path) -> None:
+    """Create a directory (and parents) once per process"""
+    if path not in _MKDIR_DONE:
+        path.mkdir(parents=True, exist_ok=True)
+        _MKDIR_DONE.add(path)
+
 
 class Agent:
     """Main Agent class that handles task execution and memory management"""
 
+    __slots__ = (
+        "task_id",
+        "checkpoint_count",
+        "config",
+        "tools",
+        "_tool_table",
+        "_tool_names",
+        "state",
+        "llm",
+        "_shared_llm",
+        "_default_llm",
+        "_state_dirty",
+        "_defer_saves",
+        "_pending_events",
+        "_needs_snapshot",
+        "_snapshot_task_id",
+        "_events_since_snapshot",
+        "_has_task_history",
+        "_log_buffer",
+        "_tool_semaphore",
+        "approval_callback",
+        "debug_session",
+        "debug_callback",
+        "_debug_on",
+        "logger",
+        "storage",
+    )
+
+    # Appended state events between full snapshots of the task state
+    SNAPSHOT_INTERVAL = 10
+
     def __init__(self, config: AgentConfig, approval_callback: Optional[ApprovalCallback] = None):
         """Initialize the agent with the given configuration"""
-        self.task_id = str(uuid.uuid4())
-        self.checkpoint_count = 0
         self.config = config
-        self.tools: Dict[str, BaseTool] = {}
-        self.state = TaskState()
+        # Registered tools, exposed read-only as self.tools; only register_tool adds to the table
+        self._tool_table: Dict[str, BaseTool] = {}
+        self.tools: Mapping[str, BaseTool] = MappingProxyType(self._tool_table)
+        # Tool names handed to the LLM each iteration, rebuilt when a tool is registered
+        self._tool_names: Tuple[str, ...] = ()
         self.llm: Optional[BaseLLMProvider] = None
+        # Provider taken from the shared registry, and what self.llm was built as around it
+        self._shared_llm: Optional[BaseLLMProvider] = None
+        self._default_llm: Optional[BaseLLMProvider] = None
+        # Once storage holds any task it stays non-empty, so a positive check is cached
+        self._has_task_history = False
+        # Bounds how many tool calls from one LLM step run at once. Created on first use:
+        # before Python 3.10 asyncio primitives bind to the loop current at construction
+        self._tool_semaphore: Optional[asyncio.Semaphore] = None
         self.approval_callback = approval_callback or ConsoleApprovalCallback()
 
         # Debug session
         self.debug_session = DebugSession()
-        self.debug_callback: Optional[DebugCallback] = None
+
+        self._init_task_fields()
 
         # Initialize logger based on mode
-        log_path = self.config.working_directory / ".llm_agent" / "logs" / "agent.log"
-        log_path.parent.mkdir(parents=True, exist_ok=True)
+        log_path = self.config.log_path
+        _ensure_dir(log_path.parent)
         self.config.logging.file_path = log_path
 
         # Use TyperLogger in CLI mode, otherwise use default logger
-        is_cli_mode = sys.stdin.isatty() and sys.stdout.isatty()
-        if is_cli_mode:
+        if _IS_CLI_MODE:
             self.logger = TyperLogger("agent", self.config.logging)
             self.logger.show_panel("Agent Initialization", "Setting up agent with CLI mode", style="cyan")
         else:
-            self.logger = AgentLogger("agent", self.config.logging)
+            self.logger = get_agent_logger("agent", self.config.logging)
 
         # Initialize state storage
         storage_config = self.config.state_storage
-        storage_path = storage_config.path or (self.config.working_directory / ".llm_agent" / "state")
-        storage_path.mkdir(parents=True, exist_ok=True)
+        storage_path = self.config.storage_path
+        _ensure_dir(storage_path)
 
         self.storage: StateStorage = (
             SqliteStateStorage(storage_path / "state.db")
@@ -61,6 +125,52 @@ class Agent:
         # Initialize tools and LLM provider
         self._initialize_components()
 
+    def _init_task_fields(self) -> None:
+        """Set up the per-task state: task id, task state, save and log batching, debug hooks"""
+        self.task_id = str(uuid.uuid4())
+        self.checkpoint_count = 0
+        self.state = TaskState()
+        # While a task runs, state changes are marked dirty and written in batches.
+        # Changes are appended to storage as events, with periodic full snapshots.
+        self._state_dirty = False
+        self._defer_saves = False
+        self._pending_events: List[Dict[str, Any]] = []
+        self._needs_snapshot = True
+        self._snapshot_task_id: Optional[str] = None
+        self._events_since_snapshot = 0
+        # Log messages from the task loop are written together once per iteration
+        self._log_buffer: List[Tuple[int, str, Dict[str, Any]]] = []
+        self.debug_callback: Optional[DebugCallback] = None
+        # Whether breakpoints can fire for the running task, fixed when the task starts
+        self._debug_on = False
+
+    def _fork(self) -> "Agent":
+        """
+        Create an agent for running one more task alongside this one
+
+        The fork shares this agent's configuration, tools, LLM provider, approval
+        callback, logger and storage, and has its own task state and debug session.
+        """
+        worker = type(self).__new__(type(self))
+        # Created now so every fork shares the one limit
+        self._get_tool_semaphore()
+        for name in (
+            "config",
+            "tools",
+            "_tool_table",
+            "_tool_names",
+            "llm",
+            "_has_task_history",
+            "_tool_semaphore",
+            "approval_callback",
+            "logger",
+            "storage",
+        ):
+            setattr(worker, name, getattr(self, name))
+        worker.debug_session = self.debug_session.model_copy(deep=True)
+        worker._init_task_fields()
+        return worker
+
     def _initialize_components(self) -> None:
         """Initialize the agent's components"""
         # Initialize debug session if enabled
@@ -72,70 +182,167 @@ class Agent:
                 self.debug_session.add_breakpoint(name=name, config=bp_config)
 
         # Import and initialize tools and LLM provider
-        from .llm import create_llm_provider
+        from .llm import CachedLLMProvider, create_llm_provider
         from .tools import get_default_tools
 
         default_tools = get_default_tools(self.config)
-        self.llm = create_llm_provider(self.config)
-
-        for tool in default_tools:
-            self.register_tool(tool)
-            if hasattr(self.llm, "register_tool"):
+        self.llm = self._shared_llm = create_llm_provider(self.config)
+        if self.config.llm_cache_enabled:
+            self.llm = CachedLLMProvider(self.llm, max_size=self.config.llm_cache_size)
+        self._default_llm = self.llm
+
+        # Register the default tools in one pass
+        self._tool_table.update((sys.intern(tool.name), tool) for tool in default_tools)
+        self._tool_names = tuple(self._tool_table)
+        if hasattr(self.llm, "register_tool"):
+            for tool in default_tools:
                 self.llm.register_tool(tool)
+        if self.logger.is_enabled_for(logging.DEBUG):
+            self.logger.debug(
+                f"Registered tools: {', '.join(tool.name for tool in default_tools)}", task_id=self.task_id
+            )
+
+    async def __aenter__(self) -> "Agent":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Release the LLM provider's and storage's resources; the agent can run several tasks before this"""
+        shared, self._shared_llm = self._shared_llm, None
+        if shared is not None:
+            # Other agents may hold the same provider; the registry closes it after the last release
+            await release_llm_provider(shared)
+        if self.llm is not None and self.llm is not self._default_llm:
+            await self.llm.aclose()
+        self.storage.close()
 
     def register_tool(self, tool: BaseTool) -> None:
         """Register a new tool with the agent"""
-        self.tools[tool.name] = tool
-        self.logger.debug(f"Registered tool: {tool.name}", task_id=self.task_id, tool_name=tool.name)
+        self._tool_table[sys.intern(tool.name)] = tool
+        self._tool_names = tuple(self._tool_table)
+        if self.logger.is_enabled_for(logging.DEBUG):
+            self.logger.debug(f"Registered tool: {tool.name}", task_id=self.task_id, tool_name=tool.name)
+
+    def _mark_state_dirty(self, event_type: Optional[str] = None, data: Any = None) -> None:
+        """
+        Record a state change; saved immediately unless a task loop is batching saves
+
+        Args:
+            event_type: State event describing the change (see apply_state_events);
+                changes without one are persisted with a full snapshot
+            data: Serialized payload of the event
+        """
+        self._state_dirty = True
+        if event_type is None:
+            self._needs_snapshot = True
+        else:
+            self._pending_events.append({"type": event_type, "data": data})
+        if not self._defer_saves:
+            self._flush_state()
+
+    def _flush_state(self) -> None:
+        """Persist the task state if it changed since the last save"""
+        if not self._state_dirty:
+            return
+
+        events = self._pending_events
+        if (
+            self._needs_snapshot
+            or self._snapshot_task_id != self.task_id
+            or self._events_since_snapshot + len(events) >= self.SNAPSHOT_INTERVAL
+        ):
+            self.storage.snapshot_state(self.task_id, self._cached_state_dict())
+            self._snapshot_task_id = self.task_id
+            self._events_since_snapshot = 0
+            self._needs_snapshot = False
+        else:
+            self.storage.append_events(self.task_id, events)
+            self._events_since_snapshot += len(events)
+
+        self._pending_events = []
+        self._state_dirty = False
+
+    def _buffer_log(self, level: int, msg: str, **kwargs: Any) -> None:
+        """Queue a log message for the next batched write"""
+        if self.logger.is_enabled_for(level):
+            self._log_buffer.append((level, msg, kwargs))
+
+    def _flush_logs(self) -> None:
+        """Write any queued log messages"""
+        if self._log_buffer:
+            self.logger.emit_batch(self._log_buffer)
+            self._log_buffer.clear()
+
+    def _cached_state_dict(self) -> Dict[str, Any]:
+        """Snapshot of the task state as a dict, maintained incrementally by TaskState
+
+        The snapshot is shared between callers and must be treated as read-only.
+        """
+        return self.state.snapshot()
 
     async def save_user_input(self, content: str, metadata: Optional[Dict[str, Any]] = None) -> None:
         """Save user input to memory"""
         self.state.add_user_input(content, metadata)
-        self.storage.save_state(self.task_id, self.state.dict())
+        self._mark_state_dirty("user_input", self.state.user_inputs[-1].model_dump())
 
     async def save_message(self, role: str, content: str, metadata: Optional[Dict[str, Any]] = None) -> None:
         """Save a conversation message"""
         self.state.add_message(role, content, metadata)
-        self.storage.save_state(self.task_id, self.state.dict())
+        self._mark_state_dirty("message", self.state.messages[-1].model_dump())
 
     async def update_context(self, updates: Dict[str, Any]) -> None:
         """Update persistent context"""
         self.state.update_context(updates)
-        self.storage.save_state(self.task_id, self.state.dict())
+        self._mark_state_dirty("context", dict(updates))
+
+    def has_task_history(self) -> bool:
+        """Check whether storage holds any task history (cached once it does)"""
+        if not self._has_task_history:
+            self._has_task_history = not self.storage.is_empty()
+        return self._has_task_history
 
     async def get_related_tasks(self, limit: int = 5) -> List[Dict[str, Any]]:
         """Get tasks related to current task"""
-        return self.storage.get_related_tasks(self.task_id, limit)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.storage.get_related_tasks, self.task_id, limit)
 
     async def search_task_history(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Search through task history"""
-        results = self.storage.search_task_history(query, limit)
-
-        tasks = []
-        for task_id, relevance in results:
-            state = self.storage.load_state(task_id)
-            if state:
-                tasks.append(
-                    {
-                        "task_id": task_id,
-                        "task": state.get("task", ""),
-                        "relevance": relevance,
-                        "completed": state.get("is_complete", False),
-                        "summary": state.get("conversation_summary", {}),
-                    }
-                )
-        return tasks
+        if not self.has_task_history():
+            return []
+
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(None, self.storage.search_task_history, query, limit)
+
+        # Load the matching states concurrently, off the event loop
+        states = await asyncio.gather(
+            *(loop.run_in_executor(None, self.storage.load_state, task_id) for task_id, _ in results)
+        )
+        return [
+            {
+                "task_id": task_id,
+                "task": state.get("task", ""),
+                "relevance": relevance,
+                "completed": state.get("is_complete", False),
+                "summary": state.get("conversation_summary", {}),
+            }
+            for (task_id, relevance), state in zip(results, states)
+            if state
+        ]
 
     async def execute_task(self, task: str, debug_callback: Optional[DebugCallback] = None) -> Any:
         """Execute a task using the LLM for guidance and tools for actions"""
         if not self.llm:
             raise RuntimeError("LLM provider not initialized")
 
-        self.logger.info(
-            f"Starting task execution: {task}",
-            task_id=self.task_id,
-            context={"state": "initializing"},
-        )
+        if self.logger.is_enabled_for(logging.INFO):
+            self.logger.info(
+                f"Starting task execution: {task}",
+                task_id=self.task_id,
+                context={"state": "initializing"},
+            )
 
         # Generate new task ID and start task
         self.task_id = str(uuid.uuid4())
@@ -143,42 +350,63 @@ class Agent:
 
         try:
             self.debug_callback = debug_callback
+            self._debug_on = self.config.debug.enabled and debug_callback is not None
+            self._defer_saves = True
 
             # Store initial task message
             await self.save_message("system", f"Starting task: {task}")
 
-            # Find related tasks for context
-            related_tasks = await self.get_related_tasks()
-            if related_tasks:
-                context_update = {"related_tasks": related_tasks}
-                await self.update_context(context_update)
+            # Find related tasks for context; the lookup compares against this task's stored state.
+            # A store that was empty before this task has nothing to relate it to.
+            if self.has_task_history():
+                self._flush_state()
+                related_tasks = await self.get_related_tasks()
+                if related_tasks:
+                    context_update = {"related_tasks": related_tasks}
+                    await self.update_context(context_update)
 
             # Begin task execution loop
             max_iterations = 50  # Prevent infinite loops
             iteration = 0
 
-            while not self.state.is_complete and iteration < max_iterations:
+            # Settings and components stay fixed for the whole task; bind them once for the loop
+            state = self.state
+            llm = self.llm
+            tools = self.tools
+            tool_names = self._tool_names
+            debug_check = self._debug_check
+            auto_approve = self.config.auto_approve_tools
+            max_auto_approvals = self.config.max_consecutive_auto_approvals
+            auto_checkpoint = self.config.state_storage.auto_checkpoint
+
+            while not state.is_complete and iteration < max_iterations:
+                # Persist the previous iteration's changes and logs in one write each
+                self._flush_state()
+                self._flush_logs()
                 iteration += 1
-                self.logger.info(
+                self._buffer_log(
+                    logging.INFO,
                     "Starting iteration",
                     task_id=self.task_id,
                     context={"iteration": iteration, "max_iterations": max_iterations},
                 )
 
                 # Debug: Check for LLM breakpoint
-                await self._handle_debug_break(BreakpointType.LLM, {"task": task, "state": self.state.dict()})
+                pending_break = debug_check(
+                    BreakpointType.LLM, lambda: {"task": task, "state": self._cached_state_dict()}
+                )
+                if pending_break is not None:
+                    await pending_break
 
                 # Get next action from LLM
-                action = await self.llm.get_next_action(
-                    task=task, state=self.state, available_tools=list(self.tools.keys())
-                )
+                action = await llm.get_next_action(task=task, state=state, available_tools=tool_names)
 
                 # Store assistant's thoughts
                 await self.save_message("assistant", action.thoughts)
 
                 # Check for task completion first
                 if action.is_complete:
-                    self.state.mark_complete()
+                    state.mark_complete()
 
                     # Store completion message
                     await self.save_message(
@@ -187,71 +415,91 @@ class Agent:
                         {"result": action.result},
                     )
 
-                    self.logger.info(
+                    self._buffer_log(
+                        logging.INFO,
                         "Task completed successfully",
                         task_id=self.task_id,
                         context={
                             "result": action.result,
-                            "duration": self.state.get_task_duration(),
+                            "duration": state.get_task_duration(),
                             "iterations": iteration,
                         },
                     )
                     return action.result or action.thoughts
 
-                # Execute tool if specified
-                if action.tool_name:
-                    tool = self.tools.get(action.tool_name)
+                # Execute requested tools; independent calls run concurrently
+                tool_calls = action.get_tool_calls()
+                if not tool_calls:
+                    continue
+
+                approved_calls: List[Tuple[BaseTool, ToolCall]] = []
+                for call in tool_calls:
+                    tool = tools.get(call.name)
                     if not tool:
-                        raise ValueError(f"Unknown tool: {action.tool_name}")
+                        raise ValueError(f"Unknown tool: {call.name}")
 
                     # Debug: Check for tool breakpoint
-                    await self._handle_debug_break(
+                    pending_break = debug_check(
                         BreakpointType.TOOL,
-                        {
-                            "tool": action.tool_name,
-                            "args": action.tool_args,
-                            "state": self.state.dict(),
+                        lambda call=call: {
+                            "tool": call.name,
+                            "args": call.args,
+                            "state": self._cached_state_dict(),
                         },
                     )
+                    if pending_break is not None:
+                        await pending_break
 
                     # Get tool approval if needed
-                    if (
-                        not self.config.auto_approve_tools
-                        or self.state.consecutive_auto_approvals >= self.config.max_consecutive_auto_approvals
-                    ):
+                    if not auto_approve or state.consecutive_auto_approvals >= max_auto_approvals:
+                        # Make sure the state is on disk while waiting on the user
+                        self._flush_state()
+                        self._flush_logs()
                         approved = await self.approval_callback.get_approval(
-                            tool_name=action.tool_name, args=action.tool_args, description=action.thoughts
+                            tool_name=call.name, args=call.args, description=action.thoughts
                         )
 
                         if not approved:
-                            self.logger.info(
-                                f"Tool execution rejected: {action.tool_name}",
+                            self._buffer_log(
+                                logging.INFO,
+                                f"Tool execution rejected: {call.name}",
                                 task_id=self.task_id,
-                                tool_name=action.tool_name,
+                                tool_name=call.name,
                             )
                             continue
 
-                        self.state.reset_auto_approvals()
+                        state.reset_auto_approvals()
                     else:
-                        self.state.increment_auto_approvals()
+                        state.increment_auto_approvals()
 
-                    result = await tool.execute(action.tool_args)
+                    approved_calls.append((tool, call))
+
+                results = await asyncio.gather(
+                    *(self._run_tool(tool, call.args) for tool, call in approved_calls), return_exceptions=True
+                )
+
+                # Record results in the order the calls were requested
+                for (_, call), result in zip(approved_calls, results):
+                    if isinstance(result, BaseException):
+                        raise result
 
                     # Store tool execution
-                    self.state.add_tool_result(action.tool_name, result, action.tool_args)
-                    self.storage.save_state(self.task_id, self.state.dict())
+                    state.add_tool_result(call.name, result, call.args)
+                    self._mark_state_dirty("tool_execution", state.tool_executions[-1].model_dump())
 
-                    # Create checkpoint if enabled
-                    if self.config.state_storage.auto_checkpoint:
-                        self._create_checkpoint(f"After executing tool: {action.tool_name}")
+                    # Create checkpoint if enabled; checkpoints copy the stored state
+                    if auto_checkpoint:
+                        self._flush_state()
+                        self._create_checkpoint(f"After executing tool: {call.name}")
 
                     # Log tool execution
-                    self.logger.info(
-                        f"Tool execution complete: {action.tool_name}",
+                    self._buffer_log(
+                        logging.INFO,
+                        f"Tool execution complete: {call.name}",
                         task_id=self.task_id,
-                        tool_name=action.tool_name,
+                        tool_name=call.name,
                         context={
-                            "args": action.tool_args,
+                            "args": call.args,
                             "result": result,
                             "iteration": iteration,
                         },
@@ -263,6 +511,7 @@ class Agent:
 
         except Exception as e:
             self.state.mark_failed(str(e))
+            self._flush_logs()
             self.logger.error(
                 f"Task execution failed: {str(e)}",
                 task_id=self.task_id,
@@ -271,24 +520,80 @@ class Agent:
             raise
 
         finally:
-            # Save final state
-            self.storage.save_state(self.task_id, self.state.dict())
+            # Save final state as a full snapshot, off the event loop
+            self._mark_state_dirty()
+            self._defer_saves = False
+            await asyncio.get_running_loop().run_in_executor(None, self._flush_state)
+            self._flush_logs()
 
+            self._debug_on = False
             if self.debug_session.active:
                 self.debug_session.stop()
                 self.debug_callback = None
 
-    async def _handle_debug_break(self, bp_type: BreakpointType, context: Dict) -> None:
-        """Handle potential debug breakpoints"""
-        if not self.config.debug.enabled or not self.debug_callback:
-            return
-
+    async def execute_tasks(self, tasks: Sequence[str], *, max_concurrency: int = 8) -> List[Any]:
+        """
+        Execute several tasks concurrently
+
+        Each task runs on a fork of this agent with its own task state, sharing the
+        tools, LLM provider and storage. At most max_concurrency tasks run at once.
+        Model requests from the running tasks are grouped into get_next_actions
+        calls, so providers can batch them.
+
+        Args:
+            tasks: Task descriptions
+            max_concurrency: Maximum number of tasks running at the same time
+
+        Returns:
+            The result of each task in order, or the exception it raised
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        llm = BatchingLLMProvider(self.llm)
+
+        async def run_one(task: str) -> Any:
+            async with semaphore:
+                worker = self._fork()
+                worker.llm = llm
+                llm.add_caller()
+                try:
+                    return await worker.execute_task(task)
+                finally:
+                    llm.remove_caller()
+
+        return await asyncio.gather(*(run_one(task) for task in tasks), return_exceptions=True)
+
+    async def _run_tool(self, tool: BaseTool, args: Dict[str, Any]) -> Any:
+        """Execute a tool, bounded by the concurrency limit and the configured timeout"""
+        async with self._get_tool_semaphore():
+            return await asyncio.wait_for(tool.execute(args), timeout=self.config.tool_timeout)
+
+    def _get_tool_semaphore(self) -> asyncio.Semaphore:
+        """Get the tool concurrency limit, creating it in the running loop on first use"""
+        if self._tool_semaphore is None:
+            self._tool_semaphore = asyncio.Semaphore(self.config.max_concurrent_tools)
+        return self._tool_semaphore
+
+    def _debug_check(
+        self, bp_type: BreakpointType, context_factory: Callable[[], Dict]
+    ) -> Optional[Coroutine[Any, Any, None]]:
+        """Get the breakpoint handler to await, or None without creating a coroutine when debugging is off"""
+        if not self._debug_on or not self.debug_session.active:
+            return None
+        return self._handle_debug_break(bp_type, context_factory)
+
+    async def _handle_debug_break(self, bp_type: BreakpointType, context_factory: Callable[[], Dict]) -> None:
+        """Handle potential debug breakpoints
+
+        Reached through _debug_check, so the breakpoint context is only built once a
+        debugger is attached and active.
+        """
+        context = context_factory()
         if self.debug_session.should_break(bp_type, context):
             info = DebugInfo(
-                timestamp=datetime.utcnow(),
+                timestamp=time.time_ns(),
                 action=bp_type.value,
                 details=context,
-                context={"state": self.state.dict()},
+                context={"state": self._cached_state_dict()},
             )
 
             self.debug_callback.on_break(info)
@@ -2,9 +2,13 @@
 Base callback system for LLM Agent
 """
 
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Any, Dict, Optional
 
+_YES = frozenset({"y", "yes"})
+_NO = frozenset({"n", "no"})
+
 
 class ApprovalCallback(ABC):
     """Base class for handling user approvals"""
@@ -46,10 +50,14 @@ class ConsoleApprovalCallback(ApprovalCallback):
         if description:
             print(f"Description: {description}")
 
+        loop = asyncio.get_running_loop()
         while True:
-            response = input("\nDo you approve this tool execution? (y/n): ").lower()
-            if response in ("y", "yes"):
+            # Read in a worker thread so the event loop keeps running while waiting on the user
+            response = (
+                await loop.run_in_executor(None, input, "\nDo you approve this tool execution? (y/n): ")
+            ).lower()
+            if response in _YES:
                 return True
-            if response in ("n", "no"):
+            if response in _NO:
                 return False
             print("Please enter 'y' or 'n'")
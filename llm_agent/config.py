@@ -2,17 +2,90 @@
 Agent configuration
 """
 
+import mmap
 import os
+import re
+from functools import cached_property
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 import yaml
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, field_validator
 
-from .debug import BreakpointConfig, BreakpointType
+from .debug import BreakpointConfig
 from .logging import DebugConfig, LogConfig
 from .state.config import StateStorageConfig
 
+try:
+    # libyaml-backed loader, considerably faster than the pure-Python one
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # pragma: no cover - PyYAML built without libyaml
+    from yaml import SafeLoader
+
+# Parsed configs keyed on (absolute path, mtime, size, cwd), each stored with the values
+# of the environment variables it substituted so a changed variable forces a reload
+_CONFIG_CACHE: Dict[Tuple[str, int, int, str], Tuple[Dict[str, Optional[str]], "AgentConfig"]] = {}
+_CONFIG_CACHE_SIZE = 16
+
+
+def clear_config_cache() -> None:
+    """Drop all cached configurations so the next from_yaml call re-reads its file"""
+    _CONFIG_CACHE.clear()
+
+
+_ENV_VAR_PATTERN = re.compile(r"\$\{([^}]+)\}")
+
+
+def _expand_env_string(value: str, env: Dict[str, Optional[str]]) -> Optional[str]:
+    """Substitute ${VAR} references in a string, recording each lookup in env
+
+    A value that is exactly one reference becomes the variable's value (None when
+    unset); references embedded in longer strings are left as-is when unset.
+    """
+    if "$" not in value:
+        return value
+
+    match = _ENV_VAR_PATTERN.fullmatch(value)
+    if match:
+        name = match.group(1)
+        env[name] = os.environ.get(name)
+        return env[name]
+
+    def substitute(m: re.Match) -> str:
+        name = m.group(1)
+        env[name] = os.environ.get(name)
+        return m.group(0) if env[name] is None else env[name]
+
+    return _ENV_VAR_PATTERN.sub(substitute, value)
+
+
+def _read_yaml(config_path: str) -> Any:
+    """Parse a YAML file from a read-only memory map, letting libyaml decode the raw bytes"""
+    with open(config_path, "rb") as f:
+        # mmap cannot map an empty file; an empty document parses to None either way
+        if os.fstat(f.fileno()).st_size == 0:
+            return yaml.load(b"", Loader=SafeLoader)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, "madvise"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            return yaml.load(mm, Loader=SafeLoader)
+
+
+def _expand_env_vars(document: Any, env: Dict[str, Optional[str]]) -> None:
+    """Expand ${VAR} references in every string of a parsed YAML document, in place"""
+    stack = [document] if isinstance(document, (dict, list)) else []
+    while stack:
+        container = stack.pop()
+        items = container.items() if isinstance(container, dict) else enumerate(container)
+        for key, value in items:
+            if isinstance(value, str):
+                expanded = _expand_env_string(value, env)
+                # Only write back strings that actually changed
+                if expanded is not value:
+                    container[key] = expanded
+            elif isinstance(value, (dict, list)):
+                stack.append(value)
+
 
 class DebugSettings(BaseModel):
     """Debug settings configuration"""
@@ -32,21 +105,52 @@ class AgentConfig(BaseModel):
     working_directory: Path
     state_storage: StateStorageConfig = StateStorageConfig()
     rate_limit: int = 60
+    llm_max_concurrency: int = 10
+    llm_use_batch_api: bool = False
     auto_approve_tools: bool = False
     max_consecutive_auto_approvals: int = 3
+    llm_cache_enabled: bool = False
+    llm_cache_size: int = 128
+    tool_timeout: Optional[float] = None
+    max_concurrent_tools: int = 4
     debug: DebugSettings = DebugSettings()
     logging: LogConfig = LogConfig()
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        # Derived paths are cached; drop them when the fields they derive from change
+        if name in ("working_directory", "state_storage"):
+            self.__dict__.pop("log_path", None)
+            self.__dict__.pop("storage_path", None)
+
+    @cached_property
+    def log_path(self) -> Path:
+        """Agent log file inside the working directory, computed on first access"""
+        return self.working_directory / ".llm_agent" / "logs" / "agent.log"
+
+    @cached_property
+    def storage_path(self) -> Path:
+        """State storage directory (configured path or the working directory default), computed on first access"""
+        return self.state_storage.path or (self.working_directory / ".llm_agent" / "state")
+
+    @field_validator("working_directory", mode="before")
+    @classmethod
+    def resolve_working_directory(cls, v: Any) -> Any:
+        """Resolve a working directory given as a string to an absolute Path"""
+        if isinstance(v, str):
+            return Path(v).resolve()
+        return v
+
+    @field_validator("working_directory")
     @classmethod
-    @validator("working_directory")
     def validate_working_directory(cls, v: Path) -> Path:
         """Ensure working directory exists"""
         if not v.exists():
             raise ValueError(f"Working directory does not exist: {v}")
         return v
 
+    @field_validator("api_key")
     @classmethod
-    @validator("api_key")
     def validate_api_key(cls, v: str) -> str:
         """Ensure API key is provided"""
         if not v.strip():
@@ -55,16 +159,7 @@ class AgentConfig(BaseModel):
 
     def dict(self, *args, **kwargs) -> Dict[str, Any]:
         """Convert to dictionary with proper Path handling"""
-        d = super().dict(*args, **kwargs)
-        # Convert Path objects to strings
-        d["working_directory"] = str(d["working_directory"])
-        if "file_path" in d.get("logging", {}):
-            if d["logging"]["file_path"]:
-                d["logging"]["file_path"] = str(d["logging"]["file_path"])
-        if "path" in d.get("state_storage", {}):
-            if d["state_storage"]["path"]:
-                d["state_storage"]["path"] = str(d["state_storage"]["path"])
-        return d
+        return self.model_dump(*args, mode="json", **kwargs)
 
     def enable_debug(
         self,
@@ -91,6 +186,9 @@ class AgentConfig(BaseModel):
     def from_yaml(cls, config_path: str) -> "AgentConfig":
         """Load configuration from a YAML file.
 
+        Parsed configurations are cached until the file changes, so repeated loads
+        of the same file skip parsing and validation. Each call returns its own copy.
+
         Args:
             config_path: Path to the YAML configuration file
 
@@ -101,31 +199,41 @@ class AgentConfig(BaseModel):
             ValueError: If environment variables are not found
             FileNotFoundError: If the config file doesn't exist
         """
-        with open(config_path) as f:
-            config_dict = yaml.safe_load(f)
+        path = os.path.abspath(config_path)
+        st = os.stat(path)
+        key = (path, st.st_mtime_ns, st.st_size, os.getcwd())
+        cached = _CONFIG_CACHE.get(key)
+        if cached is not None:
+            cached_env, cached_config = cached
+            if all(os.environ.get(name) == value for name, value in cached_env.items()):
+                return cached_config.model_copy(deep=True)
+
+        env: Dict[str, Optional[str]] = {}
+        config = cls._load_yaml(path, env)
+        if len(_CONFIG_CACHE) >= _CONFIG_CACHE_SIZE:
+            _CONFIG_CACHE.clear()
+        _CONFIG_CACHE[key] = (env, config)
+        return config.model_copy(deep=True)
+
+    @classmethod
+    def _load_yaml(cls, config_path: str, env: Dict[str, Optional[str]]) -> "AgentConfig":
+        """Parse and validate a YAML config file, recording the environment variables used in env"""
+        config_dict = _read_yaml(config_path)
 
         # Handle environment variable substitution
-        for key in ["api_key", "base_url"]:
-            if isinstance(config_dict.get(key), str) and config_dict[key].startswith("${"):
-                env_var = config_dict[key][2:-1]  # Remove ${ and }
-                config_dict[key] = os.environ.get(env_var)
-                if key == "api_key" and not config_dict[key]:
+        api_key = config_dict.get("api_key")
+        _expand_env_vars(config_dict, env)
+        if isinstance(api_key, str):
+            for env_var in _ENV_VAR_PATTERN.findall(api_key):
+                if not env.get(env_var):
                     raise ValueError(f"Environment variable {env_var} not found")
 
-        # Convert working directory to Path
-        if isinstance(config_dict.get("working_directory"), str):
-            config_dict["working_directory"] = Path(config_dict["working_directory"]).resolve()
+        return cls.from_dict(config_dict)
 
-        # Create nested config objects
-        config_dict["state_storage"] = StateStorageConfig(**config_dict["state_storage"])
-        config_dict["logging"] = LogConfig(**config_dict["logging"])
-
-        # Create debug settings
-        debug_dict = config_dict["debug"]
-        if "breakpoints" in debug_dict:
-            for name, bp in debug_dict["breakpoints"].items():
-                bp["type"] = BreakpointType(bp["type"])
-                debug_dict["breakpoints"][name] = BreakpointConfig(**bp)
-        config_dict["debug"] = DebugSettings(**debug_dict)
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AgentConfig":
+        """Create a configuration from a plain dictionary, e.g. a parsed YAML document
 
-        return cls(**config_dict)
+        Nested sections, paths and breakpoint types are coerced during validation.
+        """
+        return cls.model_validate(data)
@@ -2,21 +2,59 @@
 Debug system for LLM Agent
 """
 
-from datetime import datetime
+import time
+from datetime import datetime, timezone
 from enum import Enum
-from typing import Dict, Optional
+from functools import lru_cache
+from types import CodeType
+from typing import Any, Dict, Optional, Tuple
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, PrivateAttr
 
 
 class BreakpointType(str, Enum):
     """Types of breakpoints that can be set"""
 
+    index: int  # Position of the member in definition order, for table lookups
+
+    def __new__(cls, value: str) -> "BreakpointType":
+        member = str.__new__(cls, value)
+        member._value_ = value
+        member.index = len(cls._member_names_)
+        return member
+
     TOOL = "tool"  # Break before tool execution
     STATE = "state"  # Break on state changes
     LLM = "llm"  # Break before LLM calls
 
 
+# Globals for evaluating breakpoint conditions: only side-effect free builtins are reachable
+_CONDITION_GLOBALS = {
+    "__builtins__": {
+        "abs": abs,
+        "all": all,
+        "any": any,
+        "bool": bool,
+        "float": float,
+        "int": int,
+        "isinstance": isinstance,
+        "len": len,
+        "max": max,
+        "min": min,
+        "str": str,
+    }
+}
+
+
+@lru_cache(maxsize=128)
+def _compile_condition(condition: str) -> Optional[CodeType]:
+    """Compile a breakpoint condition once, returning None if it is not a valid expression"""
+    try:
+        return compile(condition, "<breakpoint>", "eval")
+    except SyntaxError:
+        return None
+
+
 class BreakpointConfig(BaseModel):
     """Represents a debug breakpoint"""
 
@@ -37,25 +75,66 @@ class DebugSession(BaseModel):
     active: bool = False
     step_by_step: bool = False
     breakpoints: Dict[str, Breakpoint] = {}
-    start_time: Optional[datetime] = None
+    start_time: Optional[float] = None  # time.monotonic() when the session started
+
+    # (name, breakpoint) pairs grouped by type and indexed by BreakpointType.index, rebuilt
+    # when breakpoints are added, removed or replaced, and dropped when the session is copied
+    _table: Optional[Tuple[Tuple[Tuple[str, Breakpoint], ...], ...]] = PrivateAttr(default=None)
+    # Number of breakpoints the table was built from
+    _table_size: int = PrivateAttr(default=0)
+
+    def __copy__(self) -> "DebugSession":
+        copied = super().__copy__()
+        copied._table = None
+        return copied
+
+    def __deepcopy__(self, memo: Optional[Dict[int, Any]] = None) -> "DebugSession":
+        # The copied table would point at the original breakpoints, not the copies
+        copied = super().__deepcopy__(memo)
+        copied._table = None
+        return copied
 
     def start(self) -> None:
         """Start debug session"""
         self.active = True
-        self.start_time = datetime.utcnow()
+        self.start_time = time.monotonic()
 
     def stop(self) -> None:
         """Stop debug session"""
         self.active = False
 
+    def elapsed(self) -> float:
+        """Get seconds since the session started, or 0.0 if it never started"""
+        if self.start_time is None:
+            return 0.0
+        return time.monotonic() - self.start_time
+
     def add_breakpoint(self, name: str, config: BreakpointConfig) -> None:
         """Add a new breakpoint"""
         self.breakpoints[name] = Breakpoint(**config.model_dump())
+        self._table = None
 
     def remove_breakpoint(self, name: str) -> None:
         """Remove a breakpoint"""
         if name in self.breakpoints:
             del self.breakpoints[name]
+            self._table = None
+
+    def _breakpoints_of_type(self, bp_type: BreakpointType) -> Tuple[Tuple[str, Breakpoint], ...]:
+        """Get the (name, breakpoint) pairs of one type, grouping all breakpoints by type on first use"""
+        table = self._table
+        if table is not None and self._table_size == len(self.breakpoints):
+            entries = table[bp_type.index]
+            # Breakpoints assigned straight into the dict replace the ones the table holds
+            breakpoints = self.breakpoints
+            if all(breakpoints.get(name) is bp for name, bp in entries):
+                return entries
+
+        self._table = table = tuple(
+            tuple((name, bp) for name, bp in self.breakpoints.items() if bp.type is t) for t in BreakpointType
+        )
+        self._table_size = len(self.breakpoints)
+        return table[bp_type.index]
 
     def should_break(self, bp_type: BreakpointType, context: Dict) -> bool:
         """
@@ -75,14 +154,23 @@ class DebugSession(BaseModel):
         if self.step_by_step:
             return True
 
+        # Conditions see the context under its own name
+        scope = None
+
         # Check matching breakpoints
-        for bp in self.breakpoints.values():
-            if not bp.enabled or bp.type != bp_type:
+        for _, bp in self._breakpoints_of_type(bp_type):
+            if not bp.enabled:
                 continue
 
             if bp.condition:
+                code = _compile_condition(bp.condition)
+                if code is None:
+                    # Skip conditions that don't compile
+                    continue
+                if scope is None:
+                    scope = {"context": context}
                 try:
-                    if eval(bp.condition, {"context": context}):
+                    if eval(code, _CONDITION_GLOBALS, scope):
                         return True
                 except Exception:
                     # Skip invalid conditions
@@ -96,11 +184,22 @@ class DebugSession(BaseModel):
 class DebugInfo(BaseModel):
     """Debug information for current execution"""
 
-    timestamp: datetime
+    timestamp: int  # Nanoseconds since the epoch, from time.time_ns()
     action: str
     details: Dict
     context: Dict
 
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
+    @property
+    def time(self) -> datetime:
+        """Timestamp as a timezone-aware UTC datetime"""
+        return datetime.fromtimestamp(self.timestamp / 1e9, tz=timezone.utc)
+
+    def isoformat(self) -> str:
+        """Timestamp in ISO 8601 format"""
+        return self.time.isoformat()
+
 
 class DebugCallback:
     """Callback interface for debug events"""
@@ -2,14 +2,88 @@
 LLM provider initialization and factory
 """
 
+import asyncio
+from typing import Dict, Tuple
+
 from ..config import AgentConfig
 from .base import BaseLLMProvider
-from .openai import OpenAIProvider
+from .batching import BatchingLLMProvider
+from .cache import CachedLLMProvider
+
+# Providers handed out by create_llm_provider, keyed by event loop and the settings they were built from
+_providers: Dict[Tuple, BaseLLMProvider] = {}
+# Number of unreleased create_llm_provider results for each shared provider
+_references: Dict[BaseLLMProvider, int] = {}
 
 
 def create_llm_provider(config: AgentConfig) -> BaseLLMProvider:
     """
-    Create an LLM provider instance based on configuration
+    Get a shared LLM provider instance for the configuration
+
+    Configurations with the same provider, API key, rate limits and base URL share one
+    instance per event loop, and with it one HTTP client and one rate limit window.
+    Each call takes a reference that is given back with release_llm_provider; the
+    provider is closed once the last one is released. Use build_llm_provider for an
+    instance of your own.
+
+    Args:
+        config: Agent configuration containing provider selection
+
+    Returns:
+        Initialized LLM provider
+
+    Raises:
+        ValueError: If provider type is not supported
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    # HTTP clients can't outlive their loop, so entries for closed loops are dropped
+    for key in [key for key in _providers if key[0] is not None and key[0].is_closed()]:
+        _references.pop(_providers.pop(key), None)
+
+    key = (
+        loop,
+        config.llm_provider,
+        config.api_key,
+        config.rate_limit,
+        config.llm_max_concurrency,
+        config.llm_use_batch_api,
+        config.base_url,
+    )
+    provider = _providers.get(key)
+    if provider is None or provider.is_closed():
+        _references.pop(provider, None)
+        provider = _providers[key] = build_llm_provider(config)
+    _references[provider] = _references.get(provider, 0) + 1
+    return provider
+
+
+async def release_llm_provider(provider: BaseLLMProvider) -> None:
+    """
+    Give back a provider obtained from create_llm_provider
+
+    The provider is closed when no other user holds it. Providers that did not come
+    from create_llm_provider are closed right away.
+
+    Args:
+        provider: Provider to release
+    """
+    count = _references.pop(provider, 0) - 1
+    if count > 0:
+        _references[provider] = count
+        return
+
+    for key in [key for key, shared in _providers.items() if shared is provider]:
+        del _providers[key]
+    await provider.aclose()
+
+
+def build_llm_provider(config: AgentConfig) -> BaseLLMProvider:
+    """
+    Create a new LLM provider instance based on configuration
 
     Args:
         config: Agent configuration containing provider selection
@@ -20,8 +94,17 @@ def create_llm_provider(config: AgentConfig) -> BaseLLMProvider:
     Raises:
         ValueError: If provider type is not supported
     """
+    # Provider modules pull in their vendor SDKs, so import them only when selected
     if config.llm_provider == "openai":
-        return OpenAIProvider(api_key=config.api_key, rpm=config.rate_limit)
+        from .openai import OpenAIProvider
+
+        return OpenAIProvider(
+            api_key=config.api_key,
+            rpm=config.rate_limit,
+            base_url=config.base_url,
+            max_concurrency=config.llm_max_concurrency,
+            use_batch_api=config.llm_use_batch_api,
+        )
     elif config.llm_provider == "anthropic":
         # TODO: Implement Anthropic provider
         raise NotImplementedError("Anthropic provider not yet implemented")
@@ -29,4 +112,20 @@ def create_llm_provider(config: AgentConfig) -> BaseLLMProvider:
         raise ValueError(f"Unsupported LLM provider: {config.llm_provider}")
 
 
-__all__ = ["BaseLLMProvider", "create_llm_provider"]
+def __getattr__(name: str):
+    """Import provider classes on first access instead of at package import"""
+    if name == "OpenAIProvider":
+        from .openai import OpenAIProvider
+
+        return OpenAIProvider
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = [
+    "BaseLLMProvider",
+    "BatchingLLMProvider",
+    "CachedLLMProvider",
+    "build_llm_provider",
+    "create_llm_provider",
+    "release_llm_provider",
+]
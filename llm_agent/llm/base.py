@@ -2,51 +2,88 @@
 Base LLM provider interface
 """
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 
 from ..state.task_state import TaskState
 
 
+class ToolCall(BaseModel):
+    """A single tool invocation requested by the LLM"""
+
+    name: str
+    args: dict = Field(default_factory=dict)
+
+    model_config = ConfigDict(frozen=True)
+
+
 class LLMAction(BaseModel):
     """Represents an action to be taken by the agent"""
 
     tool_name: Optional[str] = None
-    tool_args: dict = {}
+    tool_args: dict = Field(default_factory=dict)
+    # Independent tool calls to run concurrently, used instead of tool_name/tool_args
+    tool_calls: List[ToolCall] = Field(default_factory=list)
     is_complete: bool = False
     result: Optional[str] = None
     thoughts: Optional[str] = None
 
+    # Actions are produced once per LLM turn and only read afterwards
+    model_config = ConfigDict(frozen=True)
+
+    def get_tool_calls(self) -> List[ToolCall]:
+        """Get every tool call in this action, including a single tool_name/tool_args call"""
+        if self.tool_calls:
+            return self.tool_calls
+        if self.tool_name:
+            return [ToolCall(name=self.tool_name, args=self.tool_args)]
+        return []
+
 
 class BaseLLMProvider(ABC):
     """Base class for LLM providers"""
 
     @abstractmethod
-    async def get_next_action(self, task: str, state: TaskState, available_tools: List[str]) -> LLMAction:
+    async def get_next_action(self, task: str, state: TaskState, available_tools: Sequence[str]) -> LLMAction:
         """
         Get the next action to take based on the current task and state
 
         Args:
             task: The current task description
             state: Current task state
-            available_tools: List of available tool names
+            available_tools: Names of the available tools
 
         Returns:
             LLMAction containing the next action to take
         """
         pass
 
+    async def get_next_actions(self, requests: Sequence[Tuple[str, TaskState, Sequence[str]]]) -> List[LLMAction]:
+        """
+        Get the next action for several independent tasks
+
+        Requests are issued concurrently; the provider's own limits decide how many are in flight.
+
+        Args:
+            requests: (task, state, available_tools) for each task
+
+        Returns:
+            One LLMAction per request, in the same order
+        """
+        return list(await asyncio.gather(*(self.get_next_action(*request) for request in requests)))
+
     @abstractmethod
-    async def format_prompt(self, task: str, state: TaskState, available_tools: List[str]) -> str:
+    async def format_prompt(self, task: str, state: TaskState, available_tools: Sequence[str]) -> str:
         """
         Format the prompt for the LLM
 
         Args:
             task: The current task description
             state: Current task state
-            available_tools: List of available tool names
+            available_tools: Names of the available tools
 
         Returns:
             Formatted prompt string
@@ -65,3 +102,10 @@ class BaseLLMProvider(ABC):
             Parsed LLMAction
         """
         pass
+
+    async def aclose(self) -> None:  # noqa: B027 - optional hook, a no-op by default
+        """Release any resources (e.g. HTTP clients) held by the provider"""
+
+    def is_closed(self) -> bool:
+        """Check whether aclose() has released the provider's resources"""
+        return False
@@ -0,0 +1,98 @@
+"""
+Request batching for LLM providers
+"""
+
+import asyncio
+from typing import List, Optional, Sequence, Set, Tuple
+
+from ..state.task_state import TaskState
+from .base import BaseLLMProvider, LLMAction
+
+_Request = Tuple[str, TaskState, Sequence[str]]
+
+
+class BatchingLLMProvider(BaseLLMProvider):
+    """LLM provider wrapper that groups concurrent requests into get_next_actions calls
+
+    Callers that share the wrapper announce themselves with add_caller. Requests are
+    held until every announced caller is waiting on the model, or until max_wait
+    seconds after the first one arrived, and are then answered by one
+    get_next_actions call on the wrapped provider, so providers that batch (e.g.
+    through the OpenAI Batch API) see all of them at once. If that call raises, every
+    request in the group fails with the same error.
+    """
+
+    def __init__(self, provider: BaseLLMProvider, max_wait: float = 0.05):
+        """Wrap a provider
+
+        Args:
+            provider: Provider that answers the grouped requests
+            max_wait: Longest time in seconds a request waits for the other callers
+        """
+        self.provider = provider
+        self.max_wait = max_wait
+        self._callers = 0
+        self._pending: List[Tuple[_Request, asyncio.Future[LLMAction]]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._dispatches: Set[asyncio.Task[None]] = set()
+
+    def add_caller(self) -> None:
+        """Announce a caller whose requests should be grouped with the others"""
+        self._callers += 1
+
+    def remove_caller(self) -> None:
+        """Withdraw a caller; requests already waiting are sent once nobody else can join them"""
+        self._callers -= 1
+        if self._pending and len(self._pending) >= self._callers:
+            self._flush()
+
+    async def get_next_action(self, task: str, state: TaskState, available_tools: Sequence[str]) -> LLMAction:
+        """Get the next action, answered together with the other callers' pending requests"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(((task, state, available_tools), future))
+        if len(self._pending) >= self._callers:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        """Send the collected requests to the wrapped provider"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        dispatch = asyncio.ensure_future(self._dispatch(pending))
+        # The loop only keeps weak references to tasks
+        self._dispatches.add(dispatch)
+        dispatch.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, pending: List[Tuple[_Request, "asyncio.Future[LLMAction]"]]) -> None:
+        """Answer one group of requests and resolve their futures"""
+        try:
+            actions = await self.provider.get_next_actions([request for request, _ in pending])
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), action in zip(pending, actions):
+            if not future.done():
+                future.set_result(action)
+
+    async def format_prompt(self, task: str, state: TaskState, available_tools: Sequence[str]) -> str:
+        """Format the prompt with the wrapped provider"""
+        return await self.provider.format_prompt(task, state, available_tools)
+
+    async def parse_response(self, response: str) -> LLMAction:
+        """Parse a response with the wrapped provider"""
+        return await self.provider.parse_response(response)
+
+    async def aclose(self) -> None:
+        """Close the wrapped provider"""
+        await self.provider.aclose()
+
+    def is_closed(self) -> bool:
+        """Check whether the wrapped provider has been closed"""
+        return self.provider.is_closed()
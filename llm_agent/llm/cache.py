@@ -0,0 +1,105 @@
+"""
+Response caching for LLM providers
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+from ..state.task_state import TaskState
+from ..tools.base import BaseTool
+from .base import BaseLLMProvider, LLMAction
+
+
+class CachedLLMProvider(BaseLLMProvider):
+    """LLM provider wrapper that reuses actions for identical prompts
+
+    Prompts are rendered by the wrapped provider and hashed, so two calls share an
+    entry exactly when the model would see the same input. Only actionable responses
+    (a tool call or a completion) are stored; errors and unparseable replies are
+    always retried. The least recently used entry is evicted once the cache is full.
+    Actions are frozen, so cached ones are handed out as-is.
+    """
+
+    def __init__(self, provider: BaseLLMProvider, max_size: int = 128):
+        """Wrap a provider
+
+        Args:
+            provider: Provider that answers cache misses
+            max_size: Maximum number of cached actions
+        """
+        self.provider = provider
+        self.max_size = max_size
+        self._cache: OrderedDict[bytes, LLMAction] = OrderedDict()
+
+    def register_tool(self, tool: BaseTool) -> None:
+        """Register a tool with the wrapped provider"""
+        if hasattr(self.provider, "register_tool"):
+            self.provider.register_tool(tool)
+
+    def _cache_key(self, prompt: str) -> bytes:
+        """Hash a rendered prompt into a cache key"""
+        return hashlib.blake2b(prompt.encode(), digest_size=16).digest()
+
+    async def get_next_action(self, task: str, state: TaskState, available_tools: Sequence[str]) -> LLMAction:
+        """Get the next action, from the cache when the same prompt was answered before"""
+        key = self._cache_key(await self.format_prompt(task, state, available_tools))
+        action = self._cache.get(key)
+        if action is not None:
+            self._cache.move_to_end(key)
+            return action
+
+        action = await self.provider.get_next_action(task, state, available_tools)
+        self._store(key, action)
+        return action
+
+    async def get_next_actions(self, requests: Sequence[Tuple[str, TaskState, Sequence[str]]]) -> List[LLMAction]:
+        """Get the next action for several tasks, sending only the cache misses to the wrapped provider"""
+        actions: List[Optional[LLMAction]] = []
+        misses = []
+        for request in requests:
+            key = self._cache_key(await self.format_prompt(*request))
+            action = self._cache.get(key)
+            if action is not None:
+                self._cache.move_to_end(key)
+            else:
+                misses.append((len(actions), key, request))
+            actions.append(action)
+
+        if misses:
+            answers = await self.provider.get_next_actions([request for _, _, request in misses])
+            for (i, key, _), action in zip(misses, answers):
+                self._store(key, action)
+                actions[i] = action
+        return actions
+
+    def _store(self, key: bytes, action: LLMAction) -> None:
+        """Cache an action if it is actionable"""
+        if action.get_tool_calls() or action.is_complete:
+            self._cache[key] = action
+            if len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+    async def format_prompt(self, task: str, state: TaskState, available_tools: Sequence[str]) -> str:
+        """Format the prompt with the wrapped provider"""
+        return await self.provider.format_prompt(task, state, available_tools)
+
+    async def parse_response(self, response: str) -> LLMAction:
+        """Parse a response with the wrapped provider"""
+        return await self.provider.parse_response(response)
+
+    async def aclose(self) -> None:
+        """Close the wrapped provider"""
+        await self.provider.aclose()
+
+    def is_closed(self) -> bool:
+        """Check whether the wrapped provider has been closed"""
+        return self.provider.is_closed()
+
+    def clear_cache(self) -> None:
+        """Drop all cached actions"""
+        self._cache.clear()
+
+    def cache_len(self) -> int:
+        """Get the number of cached actions"""
+        return len(self._cache)
@@ -2,26 +2,77 @@
 OpenAI LLM provider implementation
 """
 
+import asyncio
 import json
-import re
-import xml.etree.ElementTree as ET
+import sys
 from pathlib import Path
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Sequence, Tuple, Union
+from xml.sax.saxutils import escape
 
 import openai
 
-from ..state import TaskState
+try:
+    from lxml import etree as ET
+
+    # Tolerates slightly malformed model output; entities are never expanded
+    _XML_PARSER = ET.XMLParser(recover=True, resolve_entities=False, remove_comments=True, remove_pis=True)
+except ImportError:  # pragma: no cover - lxml is an optional speedup
+    import xml.etree.ElementTree as ET
+
+    _XML_PARSER = None
+
+try:
+    import httpx_aiohttp  # noqa: F401 - only checked for, the SDK wraps it
+
+    # aiohttp transport for the SDK (openai[aiohttp]); avoids httpx's async pool under concurrency
+    _AioHttpClient = getattr(openai, "DefaultAioHttpClient", None)
+except ImportError:  # pragma: no cover - aiohttp is an optional speedup
+    _AioHttpClient = None
+
+from ..state import TaskState, ToolExecution
+from ..state.json_utils import dumps as dumps_json, dumps_line
+from ..state.task_state import Message
 from ..tools.base import BaseTool
-from .base import BaseLLMProvider, LLMAction
-from .prompts import get_system_prompt
-from .rate_limiter import RateLimiter
+from .base import BaseLLMProvider, LLMAction, ToolCall
+from .prompts import format_tool_doc, get_system_prompt
+from .rate_limiter import AdaptiveConcurrencyLimiter, RateLimiter
+
+# Batch API statuses after which a batch will not change any more
+_BATCH_FINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+# Number of rendered system prompts kept per provider
+_SYSTEM_PROMPT_CACHE_SIZE = 128
+# Number of rendered conversation lines and tool executions kept per provider. The provider
+# is shared by every task with the same settings, so these hold several tasks' windows at once
+_MESSAGE_CACHE_SIZE = 2048
+_TOOL_ENTRY_CACHE_SIZE = 512
+
+_RESPONSE_OPEN = "<response>"
+_RESPONSE_CLOSE = "</response>"
+
+# Layout of the full prompt; only the two sections are filled in per call
+_PROMPT_TEMPLATE = """{base_prompt}
+
+====
+
+TASK MEMORY AND CONTEXT
+
+{memory_prompt}
+
+Now, proceed with the next step of the task."""
 
 
 class OpenAIProvider(BaseLLMProvider):
     """OpenAI-based LLM provider implementation"""
 
     def __init__(
-        self, api_key: str, model: str = "gemini-2.0-flash-thinking-exp-01-21", rpm: int = 10, base_url: str = None
+        self,
+        api_key: str,
+        model: str = "gemini-2.0-flash-thinking-exp-01-21",
+        rpm: int = 10,
+        base_url: str = None,
+        max_concurrency: int = 10,
+        use_batch_api: bool = False,
     ):
         """Initialize with API key and rate limit
 
@@ -30,29 +81,97 @@ class OpenAIProvider(BaseLLMProvider):
             model: Model to use for completions
             rpm: Rate limit in requests per minute
             base_url: Optional base URL for the API
+            max_concurrency: Maximum number of requests in flight at once; fewer are
+                allowed while the API is throttling or timing out
+            use_batch_api: Answer get_next_actions through the Batch API, which is cheaper
+                and separately rate limited but may take up to 24 hours
         """
         self.api_key = api_key
         self.model = model
-        if base_url:
-            openai.base_url = base_url
-        openai.api_key = self.api_key
+        self.use_batch_api = use_batch_api
+        # A client of our own rather than module-level settings, so providers don't share configuration
+        self._client = openai.AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=_AioHttpClient() if _AioHttpClient is not None else None,
+        )
         self.tools: Dict[str, BaseTool] = {}
+        # Rendered documentation for each registered tool, built once at registration
+        self._tool_docs: Dict[str, str] = {}
+        # Joined documentation per tool set; agents usually offer the same tools every turn
+        self._joined_tool_docs: Dict[Tuple[str, ...], str] = {}
+        # Rendered system prompts keyed by (task, tool names, working directory), oldest first
+        self._system_prompts: Dict[Tuple[str, Tuple[str, ...], str], str] = {}
+        # Rendered conversation lines, keyed by id() of the message
+        self._message_cache: Dict[int, Tuple[Message, str]] = {}
+        # Rendered recent tool executions, keyed by id() of the execution record
+        self._tool_entry_cache: Dict[int, Tuple[ToolExecution, str]] = {}
         self.rate_limiter = RateLimiter(rpm)
+        # Caps requests in flight; the rate limiter only spaces out their start times
+        self._concurrency = AdaptiveConcurrencyLimiter(max_concurrency)
         self.working_dir = Path.cwd()
 
+    async def aclose(self) -> None:
+        """Close the HTTP client"""
+        await self._client.close()
+
+    def is_closed(self) -> bool:
+        """Check whether the HTTP client has been closed"""
+        return self._client.is_closed()
+
     def register_tool(self, tool: BaseTool) -> None:
         """Register a tool with the provider"""
         self.tools[tool.name] = tool
+        self._tool_docs[tool.name] = format_tool_doc(tool)
+        self._joined_tool_docs.clear()
+        self._system_prompts.clear()
+
+    def _get_tool_docs(self, available_tools: Sequence[str]) -> str:
+        """Get the joined documentation for a tool set, rendering it on first use"""
+        key = tuple(available_tools)
+        docs = self._joined_tool_docs.get(key)
+        if docs is None:
+            docs = self._joined_tool_docs[key] = "".join(self._tool_docs[name] for name in key)
+        return docs
+
+    def _get_system_prompt(self, task: str, available_tools: Sequence[str]) -> str:
+        """Get the system prompt for a task and tool set, rendering it on first use"""
+        tool_names = tuple(available_tools)
+        working_dir = str(self.working_dir)
+        key = (task, tool_names, working_dir)
+        prompt = self._system_prompts.get(key)
+        if prompt is None:
+            prompt = get_system_prompt(
+                task,
+                [self.tools[name] for name in tool_names],
+                working_dir,
+                tool_docs=(self._get_tool_docs(tool_names),),
+            )
+            if len(self._system_prompts) >= _SYSTEM_PROMPT_CACHE_SIZE:
+                del self._system_prompts[next(iter(self._system_prompts))]
+            self._system_prompts[key] = prompt
+        return prompt
 
     def _format_conversation_history(self, messages: List[Dict[str, Any]]) -> str:
         """Format conversation history for prompt"""
         if not messages:
             return "No previous conversation history."
 
-        formatted = []
-        for msg in messages[-50:]:  # Get last 50 messages
-            formatted.append(f"{msg.role}: {msg.content}")
-        return "\n".join(formatted)
+        # Last 50 messages; each line is rendered once and reused while it stays cached
+        return "\n".join(self._format_message(msg) for msg in messages[-50:])
+
+    def _format_message(self, msg: Message) -> str:
+        """Render one conversation message, reusing the text from earlier turns"""
+        cached = self._message_cache.get(id(msg))
+        if cached is not None and cached[0] is msg:
+            return cached[1]
+
+        line = f"{msg.role}: {msg.content}"
+        # The message itself is kept alongside so a reused id() cannot match a different one
+        if len(self._message_cache) >= _MESSAGE_CACHE_SIZE:
+            del self._message_cache[next(iter(self._message_cache))]
+        self._message_cache[id(msg)] = (msg, line)
+        return line
 
     def _format_related_tasks(self, related_tasks: List[Dict[str, Any]]) -> str:
         """Format related tasks for prompt"""
@@ -73,23 +192,36 @@ class OpenAIProvider(BaseLLMProvider):
         formatted = []
         for key, value in context.items():
             if isinstance(value, (dict, list)):
-                value = json.dumps(value, indent=2)
+                # orjson-backed when installed; same two-space layout as json.dumps(indent=2)
+                value = dumps_json(value, indent=True).decode()
             formatted.append(f"# {key}:\n{value}")
         return "\n\n".join(formatted)
 
-    async def get_next_action(self, task: str, state: TaskState, available_tools: List[str]) -> LLMAction:
+    async def get_next_action(self, task: str, state: TaskState, available_tools: Sequence[str]) -> LLMAction:
         """Get next action from OpenAI"""
         prompt = await self.format_prompt(task, state, available_tools)
 
         try:
-            # Wait for rate limit slot
-            await self.rate_limiter.acquire()
-
-            api_response = openai.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0,
-            )
+            await self._concurrency.acquire()
+            congested = False
+            try:
+                # Wait for rate limit slot
+                await self.rate_limiter.acquire()
+
+                raw_response = await self._client.chat.completions.with_raw_response.create(
+                    model=self.model,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0,
+                )
+                self.rate_limiter.observe(raw_response.headers)
+                api_response = raw_response.parse()
+            except (openai.RateLimitError, openai.APITimeoutError) as e:
+                congested = True
+                if isinstance(e, openai.RateLimitError):
+                    self.rate_limiter.observe(e.response.headers)
+                raise
+            finally:
+                await self._concurrency.release(congested)
 
             # Log rate limit metrics in debug
             if hasattr(self, "logger"):
@@ -106,12 +238,114 @@ class OpenAIProvider(BaseLLMProvider):
         except Exception as e:
             return LLMAction(thoughts=f"Error in OpenAI API call: {str(e)}", is_complete=False)
 
+    async def get_next_actions(self, requests: Sequence[Tuple[str, TaskState, Sequence[str]]]) -> List[LLMAction]:
+        """Get the next action for several independent tasks, through the Batch API if enabled"""
+        if not self.use_batch_api:
+            return await super().get_next_actions(requests)
+
+        prompts = [await self.format_prompt(*request) for request in requests]
+        try:
+            batch_id = await self.submit_batch(prompts)
+        except Exception as e:
+            return [LLMAction(thoughts=f"Error in OpenAI API call: {str(e)}", is_complete=False) for _ in prompts]
+        return await self.poll_batch(batch_id, len(prompts))
+
+    async def submit_batch(self, prompts: Sequence[str]) -> str:
+        """
+        Submit prompts as one Batch API job
+
+        Args:
+            prompts: Fully formatted prompts, answered independently
+
+        Returns:
+            ID of the created batch
+        """
+        lines = []
+        for i, prompt in enumerate(prompts):
+            request = {
+                "custom_id": str(i),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {"model": self.model, "messages": [{"role": "user", "content": prompt}], "temperature": 0},
+            }
+            lines.append(dumps_line(request))
+
+        input_file = await self._client.files.create(
+            file=("batch.jsonl", b"".join(lines)),
+            purpose="batch",
+        )
+        batch = await self._client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        return batch.id
+
+    async def poll_batch(self, batch_id: str, count: int, interval: float = 30.0) -> List[LLMAction]:
+        """
+        Wait for a batch to finish and parse its responses
+
+        Args:
+            batch_id: ID returned by submit_batch
+            count: Number of prompts submitted in the batch
+            interval: Seconds between status checks
+
+        Returns:
+            Exactly count LLMActions, in submission order; prompts without a usable
+            response get an error action
+        """
+        try:
+            batch = await self._client.batches.retrieve(batch_id)
+            while batch.status not in _BATCH_FINAL_STATUSES:
+                await asyncio.sleep(interval)
+                batch = await self._client.batches.retrieve(batch_id)
+        except Exception as e:
+            return [LLMAction(thoughts=f"Error in OpenAI API call: {str(e)}", is_complete=False) for _ in range(count)]
+
+        # Results may be missing or out of order; unanswered prompts get this action
+        unanswered = LLMAction(thoughts=f"Batch {batch_id} ended with status {batch.status}", is_complete=False)
+        results: Dict[int, LLMAction] = {}
+        # Successful requests land in the output file and failed ones in the error file
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                await self._read_batch_results(file_id, results)
+
+        return [results.get(i, unanswered) for i in range(count)]
+
+    async def _read_batch_results(self, file_id: str, results: Dict[int, LLMAction]) -> None:
+        """Parse a batch result file into results, keyed by custom_id
+
+        A file that can't be downloaded or a line that can't be parsed leaves its
+        prompts out of results.
+        """
+        try:
+            content = await self._client.files.content(file_id)
+        except Exception:
+            return
+        for line in content.text.splitlines():
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+                response = record.get("response") or {}
+                if response.get("status_code") == 200:
+                    action = await self.parse_response(response["body"]["choices"][0]["message"]["content"])
+                else:
+                    error = record.get("error") or (response.get("body") or {}).get("error")
+                    action = LLMAction(thoughts=f"Error in OpenAI API call: {error}", is_complete=False)
+                results[int(record["custom_id"])] = action
+            except Exception:
+                continue
+
     def _extract_response_xml(self, text: str) -> Union[str, None]:
         """Extract response XML from text"""
-        # Look for XML response in the text
-        pattern = r"<response>(.*?)</response>"
-        match = re.search(pattern, text, re.DOTALL)
-        return match.group(1) if match else None
+        # Plain substring scans; the content runs to the first closing tag after the opening one
+        start = text.find(_RESPONSE_OPEN)
+        if start < 0:
+            return None
+        start += len(_RESPONSE_OPEN)
+        end = text.find(_RESPONSE_CLOSE, start)
+        return text[start:end] if end >= 0 else None
 
     def _parse_args_xml(self, args_elem: ET.Element) -> Dict[str, Any]:
         """Parse XML args element into a dictionary"""
@@ -137,7 +371,13 @@ class OpenAIProvider(BaseLLMProvider):
 
             # Parse XML structure
             xml = f"<response>{xml_content}</response>"
-            root = ET.fromstring(xml)
+            root = ET.fromstring(xml, _XML_PARSER)
+            if root is None:
+                # lxml in recovery mode gives up without raising on hopeless input
+                return self._unparsable_response(response)
+
+            # Actions below are built with model_construct: every field is a str/dict/list
+            # produced by this parser, so validation would only re-check our own types
 
             # Get required elements
             thoughts = root.find("thoughts")
@@ -149,9 +389,30 @@ class OpenAIProvider(BaseLLMProvider):
 
             if is_complete:
                 # Look for result in r tag (standard) or result tag
-                result_elem = root.find("r") or root.find("result")
-                result = result_elem.text.strip() if result_elem is not None else None
-                return LLMAction(thoughts=thoughts_text, is_complete=True, result=result)
+                # Elements without children are falsy, so the lookups can't be chained with `or`
+                result_elem = root.find("r")
+                if result_elem is None:
+                    result_elem = root.find("result")
+                result = result_elem.text.strip() if result_elem is not None and result_elem.text else None
+                return LLMAction.model_construct(thoughts=thoughts_text, is_complete=True, result=result)
+
+            # Several independent calls may be grouped as <tool_calls><call><tool/><args/></call>...
+            tool_calls_elem = root.find("tool_calls")
+            if tool_calls_elem is not None:
+                tool_calls = []
+                for call in tool_calls_elem.findall("call"):
+                    call_tool = call.find("tool")
+                    call_args = call.find("args")
+                    # Calls without a tool name can't be dispatched, so they are dropped
+                    if call_tool is None or call_args is None or not (call_tool.text or "").strip():
+                        continue
+                    tool_calls.append(
+                        ToolCall.model_construct(
+                            name=sys.intern(call_tool.text.strip()), args=self._parse_args_xml(call_args)
+                        )
+                    )
+                if tool_calls:
+                    return LLMAction.model_construct(thoughts=thoughts_text, tool_calls=tool_calls, is_complete=False)
 
             # Get tool execution details
             tool = root.find("tool")
@@ -160,30 +421,64 @@ class OpenAIProvider(BaseLLMProvider):
             if tool is None or args is None:
                 return LLMAction(thoughts=thoughts_text, is_complete=False)
 
-            tool_name = tool.text.strip()
+            # Interned so the agent's tool table lookup can match on identity
+            tool_name = sys.intern(tool.text.strip())
 
             # Parse the tool args as XML
             args_dict = self._parse_args_xml(args)
 
-            return LLMAction(
+            return LLMAction.model_construct(
                 thoughts=thoughts_text,
                 tool_name=tool_name,
                 tool_args=args_dict,
                 is_complete=False,
             )
 
-        except ET.ParseError:
-            return LLMAction(
-                thoughts=f"Failed to parse response as XML: {response[:200]}...",
-                is_complete=False,
-            )
+        except SyntaxError:
+            # ParseError from ElementTree and lxml both derive from SyntaxError
+            return self._unparsable_response(response)
         except Exception as e:
             return LLMAction(thoughts=f"Error parsing response: {str(e)}", is_complete=False)
 
-    async def format_prompt(self, task: str, state: TaskState, available_tools: List[str]) -> str:
+    def _unparsable_response(self, response: str) -> LLMAction:
+        """Build the action for a response whose XML could not be parsed"""
+        return LLMAction(
+            thoughts=f"Failed to parse response as XML: {response[:200]}...",
+            is_complete=False,
+        )
+
+    def _format_tool_execution(self, te: ToolExecution) -> str:
+        """Render one tool execution for the prompt, reusing the text from earlier turns"""
+        cached = self._tool_entry_cache.get(id(te))
+        if cached is not None and cached[0] is te:
+            return cached[1]
+
+        # Format arguments and the result as XML; values are escaped so file contents and
+        # the like can't break the markup when the model echoes them back
+        args_xml = "\n".join(f"    <{k}>{escape(str(v))}</{k}>" for k, v in te.args.items())
+        result_xml = "\n".join(f"    <{k}>{escape(str(v))}</{k}>" for k, v in te.result.model_dump().items())
+
+        entry = f"""
+Tool: {te.tool_name}
+Arguments:
+<args>
+{args_xml}
+</args>
+Result:
+<r>
+{result_xml}
+</r>
+Timestamp: {te.timestamp.isoformat()}"""
+        # The execution itself is kept alongside so a reused id() cannot match a different record
+        if len(self._tool_entry_cache) >= _TOOL_ENTRY_CACHE_SIZE:
+            del self._tool_entry_cache[next(iter(self._tool_entry_cache))]
+        self._tool_entry_cache[id(te)] = (te, entry)
+        return entry
+
+    async def format_prompt(self, task: str, state: TaskState, available_tools: Sequence[str]) -> str:
         """Format prompt for OpenAI with memory integration"""
         # Get base system prompt
-        base_prompt = get_system_prompt(task, [self.tools[name] for name in available_tools], str(self.working_dir))
+        base_prompt = self._get_system_prompt(task, available_tools)
 
         # Add memory components
         memory_sections = []
@@ -208,49 +503,15 @@ class OpenAIProvider(BaseLLMProvider):
 
         # Add recent tool executions
         if state.tool_executions:
-            recent_tools = []
-
-            # Get details for the most recent tools
-            for te in state.get_recent_tools():
-                # Format arguments as XML
-                args_xml = "\n".join([f"    <{k}>{v}</{k}>" for k, v in te.args.items()])
-
-                # Format result data structure as XML
-                if hasattr(te.result, "model_dump"):
-                    # For newer Pydantic versions
-                    result_data = te.result.model_dump()
-                else:
-                    # For older Pydantic versions
-                    result_data = te.result.dict()
-
-                result_xml = "\n".join([f"    <{k}>{v}</{k}>" for k, v in result_data.items()])
-
-                # Add formatted tool execution to the list
-                recent_tools.append(f"""
-Tool: {te.tool_name}
-Arguments:
-<args>
-{args_xml}
-</args>
-Result:
-<r>
-{result_xml}
-</r>
-Timestamp: {te.timestamp.isoformat()}""")
+            # Get details for the most recent tools; each entry is rendered once and reused
+            recent_tools = [self._format_tool_execution(te) for te in state.get_recent_tools()]
 
+            tool_history = "\n".join(recent_tools)
             memory_sections.append(f"""
 # Recent Tool Executions
-{"\n".join(recent_tools)}""")
+{tool_history}""")
 
         # Combine all sections
         memory_prompt = "\n".join(memory_sections)
 
-        return f"""{base_prompt}
-
-====
-
-TASK MEMORY AND CONTEXT
-
-{memory_prompt}
-
-Now, proceed with the next step of the task."""
+        return _PROMPT_TEMPLATE.format(base_prompt=base_prompt, memory_prompt=memory_prompt)
@@ -2,15 +2,12 @@
 System prompts for LLM Providers
 """
 
-from typing import List
+from typing import List, Optional, Sequence
 
 from ..tools.base import BaseTool
 
-
-def get_system_prompt(task: str, tools: List[BaseTool], working_dir: str) -> str:
-    """Generate the system prompt for the LLM."""
-    # Basic role and expertise
-    role = """You are a Python software development specialist with expertise in:
+# Basic role and expertise
+_ROLE = """You are a Python software development specialist with expertise in:
 - Python language features and best practices
 - Common Python frameworks and libraries
 - Testing frameworks (pytest, unittest)
@@ -19,14 +16,15 @@ def get_system_prompt(task: str, tools: List[BaseTool], working_dir: str) -> str
 - Type hints and static type checking
 - Package management and distribution"""
 
-    # Tool use format
-    tool_use = """
+# Tool use format
+_TOOL_USE = """
 ====
 
 TOOL USE
 
 You have access to tools that are executed upon approval.
-Use one tool per message and wait for its result before proceeding.
+Use one tool per message and wait for its result before proceeding, unless the calls are independent
+of each other and can be grouped in <tool_calls>.
 Tool usage must follow XML format:
 
 <tool_name>
@@ -34,8 +32,8 @@ Tool usage must follow XML format:
 <param2>value2</param2>
 </tool_name>"""
 
-    # Response format - this is now a general format, specific tools may override
-    response_format = """
+# Response format - this is now a general format, specific tools may override
+_RESPONSE_FORMAT = """
 # Response Format
 
 For tool execution:
@@ -49,6 +47,26 @@ For tool execution:
 <is_complete>false</is_complete>
 </response>
 
+For several independent tool calls that can run at the same time:
+<response>
+<thoughts>Explain why these calls are independent</thoughts>
+<tool_calls>
+<call>
+<tool>tool_name</tool>
+<args>
+    <param1>value1</param1>
+</args>
+</call>
+<call>
+<tool>other_tool_name</tool>
+<args>
+    <param1>value1</param1>
+</args>
+</call>
+</tool_calls>
+<is_complete>false</is_complete>
+</response>
+
 For task completion:
 <response>
 <thoughts>Final analysis and summary</thoughts>
@@ -59,37 +77,53 @@ For task completion:
 Always wrap your code with <![CDATA[ <code gen here> ]]> to ensure the xml format
 """
 
-    # Generate tool documentation
-    tools_doc = """
+# Tool documentation heading
+_TOOLS_DOC = """
 # Available Tools"""
 
-    # Generate documentation for each tool
-    tools_detail = []
-    for tool in tools:
-        # First add the tool description
-        doc = f"""
+# Everything ahead of the tool documentation is fixed, so it is assembled once
+_PROMPT_HEADER = f"""
+{_ROLE}
+
+{_TOOL_USE}
+
+{_RESPONSE_FORMAT}
+
+{_TOOLS_DOC}
+"""
+
+
+def format_tool_doc(tool: BaseTool) -> str:
+    """Render the documentation block for one tool: description, parameters and example."""
+    # First add the tool description
+    doc = f"""
 ## {tool.name}
 {tool.description}
 """
-        # Add parameter descriptions if available
-        params = tool.get_parameters_description()
-        if params:
-            doc += "\nParameters:\n"
-            for param_name, param_desc in params:
-                doc += f"- `{param_name}`: {param_desc}\n"
+    # Add parameter descriptions if available
+    params = tool.get_parameters_description()
+    if params:
+        doc += "\nParameters:\n"
+        for param_name, param_desc in params:
+            doc += f"- `{param_name}`: {param_desc}\n"
 
-        # Add example from the tool itself
-        doc += f"\nExample:\n{tool.get_example()}\n"
+    # Add example from the tool itself
+    doc += f"\nExample:\n{tool.get_example()}\n"
 
-        tools_detail.append(doc)
+    return doc
 
-    # Combine all sections
-    return f"""
-{role}
 
-{tool_use}
+def get_system_prompt(
+    task: str, tools: List[BaseTool], working_dir: str, tool_docs: Optional[Sequence[str]] = None
+) -> str:
+    """Generate the system prompt for the LLM.
 
-{response_format}
+    tool_docs may hold the tools' documentation already rendered with format_tool_doc,
+    in the same order as tools; otherwise it is rendered here.
+    """
+    # Generate documentation for each tool
+    if tool_docs is None:
+        tool_docs = [format_tool_doc(tool) for tool in tools]
 
-{tools_doc}
-{"".join(tools_detail)}"""
+    # Combine all sections
+    return _PROMPT_HEADER + "".join(tool_docs)
@@ -3,12 +3,32 @@ Rate limiter implementation to control API requests per minute
 """
 
 import asyncio
+import re
 import time
+from collections import deque
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Deque, Dict, Mapping, Optional
 
 from ..logging import AgentLogger
 
+# One component of a reset duration such as "6m0s" or "20ms"
+_DURATION_PART_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def _parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse a rate limit header duration ("1.5", "6m0s", "20ms") into seconds"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
 
 class RateLimiter:
     """Rate limiter using sliding window with enhanced logging"""
@@ -22,7 +42,10 @@ class RateLimiter:
             logger: Optional logger for debugging
         """
         self.rpm = rpm
-        self.requests: List[float] = []
+        # Request timestamps, oldest first
+        self.requests: Deque[float] = deque()
+        # Time before which the server asked us not to send requests
+        self.blocked_until = 0.0
         self.lock = asyncio.Lock()
         self.logger = logger
 
@@ -36,14 +59,15 @@ class RateLimiter:
         """Get current rate limiter metrics"""
         now = time.time()
         window_start = now - 60
+        current_rpm = len(self.requests) - self._count_expired(window_start)
 
         metrics = {
-            "current_rpm": self.get_current_rpm(),
+            "current_rpm": current_rpm,
             "wait_time": self.get_wait_time(),
             "queue_size": len(self.requests),
             "window_start": datetime.fromtimestamp(window_start).isoformat(),
             "window_end": datetime.fromtimestamp(now).isoformat(),
-            "requests_in_window": sum(1 for ts in self.requests if ts > window_start),
+            "requests_in_window": current_rpm,
         }
 
         return metrics
@@ -57,23 +81,28 @@ class RateLimiter:
             self.logger.debug("Attempting to acquire rate limit slot", context=self._get_metrics())
 
         async with self.lock:
-            now = time.time()
-            window_start = now - 60  # 1 minute window
-
-            # Remove requests older than the window
-            expired = 0
-            while self.requests and self.requests[0] <= window_start:
-                self.requests.pop(0)
-                expired += 1
-
-            if expired > 0 and self.logger:
-                self.logger.debug(
-                    f"Removed {expired} expired request(s) from window",
-                    context={"expired_count": expired},
-                )
-
-            # If at rate limit, wait until oldest request expires
-            if len(self.requests) >= self.rpm:
+            while True:
+                now = time.time()
+
+                # Honour a pause requested by the server before looking at our own window
+                if self.blocked_until > now:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+
+                window_start = now - 60  # 1 minute window
+
+                # Remove requests older than the window
+                expired = self._evict(window_start)
+                if expired > 0 and self.logger:
+                    self.logger.debug(
+                        f"Removed {expired} expired request(s) from window",
+                        context={"expired_count": expired},
+                    )
+
+                if len(self.requests) < self.rpm:
+                    break
+
+                # At rate limit, wait until oldest request expires and recheck
                 wait_time = self.requests[0] - window_start
                 if self.logger:
                     self.logger.debug(
@@ -81,25 +110,111 @@ class RateLimiter:
                         context={"wait_time": wait_time, **self._get_metrics()},
                     )
                 await asyncio.sleep(wait_time)
-                # Recursive call to recheck after waiting
-                await self.acquire()
-            else:
-                # Add current request timestamp
-                self.requests.append(now)
-                if self.logger:
-                    self.logger.debug("Rate limit slot acquired", context=self._get_metrics())
+
+            # Add current request timestamp
+            self.requests.append(now)
+            if self.logger:
+                self.logger.debug("Rate limit slot acquired", context=self._get_metrics())
+
+    def _count_expired(self, window_start: float) -> int:
+        """Count timestamps at or before the window start without removing them"""
+        expired = 0
+        for ts in self.requests:
+            if ts > window_start:
+                break
+            expired += 1
+        return expired
+
+    def _evict(self, window_start: float) -> int:
+        """Drop timestamps at or before the window start, returning how many were dropped"""
+        requests = self.requests
+        expired = 0
+        while requests and requests[0] <= window_start:
+            requests.popleft()
+            expired += 1
+        return expired
+
+    def observe(self, headers: Mapping[str, str]) -> None:
+        """
+        Fold the server's rate limit headers into the limiter
+
+        A retry-after header, or an exhausted x-ratelimit-remaining-requests with its
+        x-ratelimit-reset-requests, pauses acquire() until the server's window reopens.
+
+        Args:
+            headers: Response headers from the API
+        """
+        pause = _parse_duration(headers.get("retry-after"))
+        if pause is None and headers.get("x-ratelimit-remaining-requests") == "0":
+            pause = _parse_duration(headers.get("x-ratelimit-reset-requests"))
+        if pause:
+            self.blocked_until = max(self.blocked_until, time.time() + pause)
+            if self.logger:
+                self.logger.debug(f"Server requested a {pause:.2f} second pause", context={"wait_time": pause})
 
     def get_current_rpm(self) -> int:
         """Get current requests per minute"""
-        now = time.time()
-        window_start = now - 60
-        return sum(1 for ts in self.requests if ts > window_start)
+        return len(self.requests) - self._count_expired(time.time() - 60)
 
     def get_wait_time(self) -> float:
         """Get time until next request slot is available"""
+        now = time.time()
+        blocked = max(0, self.blocked_until - now)
         if len(self.requests) < self.rpm:
-            return 0
+            return blocked
 
-        now = time.time()
         window_start = now - 60
-        return max(0, self.requests[0] - window_start)
+        return max(blocked, self.requests[0] - window_start)
+
+
+class AdaptiveConcurrencyLimiter:
+    """Concurrency limit that adapts to congestion (additive increase, multiplicative decrease)"""
+
+    def __init__(self, max_limit: int, min_limit: int = 1, increase: float = 0.5, decrease: float = 0.5):
+        """
+        Initialize the limiter at its maximum
+
+        Args:
+            max_limit: Upper bound on requests in flight
+            min_limit: Lower bound the limit never drops below
+            increase: Amount added to the limit after each uncongested request
+            decrease: Factor applied to the limit after a congested request
+        """
+        self.max_limit = max_limit
+        self.min_limit = min(min_limit, max_limit)
+        self.increase = increase
+        self.decrease = decrease
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        # Created on first use: before Python 3.10 asyncio primitives bind to the loop
+        # current at construction, which need not be the one the limiter runs in
+        self._condition: Optional[asyncio.Condition] = None
+
+    def _get_condition(self) -> asyncio.Condition:
+        """Get the condition guarding in_flight, creating it in the running loop on first use"""
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def acquire(self) -> None:
+        """Wait until fewer requests than the current limit are in flight"""
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, congested: bool = False) -> None:
+        """
+        Finish a request and adjust the limit
+
+        Args:
+            congested: Whether the request was throttled or timed out
+        """
+        condition = self._get_condition()
+        async with condition:
+            self.in_flight -= 1
+            if congested:
+                self.limit = max(self.min_limit, self.limit * self.decrease)
+            else:
+                self.limit = min(self.max_limit, self.limit + self.increase)
+            condition.notify_all()
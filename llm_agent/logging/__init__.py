@@ -2,13 +2,16 @@
 Logging system for LLM Agent
 """
 
+import atexit
+import itertools
 import json
 import logging
 import logging.handlers
 import os
+import queue
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Dict, Optional, Sequence, Tuple
 
 import termcolor
 from pydantic import BaseModel
@@ -149,6 +152,10 @@ class JsonFormatter(logging.Formatter):
         return json.dumps(data, indent=2)
 
 
+# Suffixes for the per-instance child loggers
+_LOGGER_IDS = itertools.count()
+
+
 class AgentLogger:
     """Logger for the LLM Agent with enhanced debug support"""
 
@@ -156,11 +163,11 @@ class AgentLogger:
         """Initialize the logger with given configuration"""
         self.name = name
         self.config = config
-        self.logger = logging.getLogger(name)
+        # A child of logging.getLogger(name) of its own, so the handlers below belong to this
+        # instance alone while records still propagate to the application's handlers
+        self.logger = logging.getLogger(name).getChild(str(next(_LOGGER_IDS)))
         self.logger.setLevel(getattr(logging, config.level.upper()))
-
-        # Remove any existing handlers
-        self.logger.handlers.clear()
+        self._listener: Optional[logging.handlers.QueueListener] = None
 
         # Add console handler if enabled
         if config.console_logging:
@@ -186,7 +193,13 @@ class AgentLogger:
                 backupCount=config.backup_count,
             )
             file_handler.setFormatter(JsonFormatter())
-            self.logger.addHandler(file_handler)
+
+            # Hand records to a background thread so log calls never wait on the disk
+            log_queue: queue.SimpleQueue = queue.SimpleQueue()
+            self._listener = logging.handlers.QueueListener(log_queue, file_handler)
+            self._listener.start()
+            atexit.register(self.close)
+            self.logger.addHandler(logging.handlers.QueueHandler(log_queue))
 
     def log(
         self,
@@ -206,6 +219,20 @@ class AgentLogger:
             tool_name: Optional tool name
             context: Optional additional context
         """
+        if not self.logger.isEnabledFor(level):
+            return
+
+        self.logger.handle(self._make_record(level, msg, task_id, tool_name, context))
+
+    def _make_record(
+        self,
+        level: int,
+        msg: str,
+        task_id: Optional[str] = None,
+        tool_name: Optional[str] = None,
+        context: Optional[Dict] = None,
+    ) -> logging.LogRecord:
+        """Build a log record carrying the structured data"""
         record = StructuredLogRecord(level=level, msg=msg, task_id=task_id, tool_name=tool_name, context=context)
 
         log_record = logging.LogRecord(
@@ -218,9 +245,31 @@ class AgentLogger:
             exc_info=None,
         )
         log_record.structured_data = record
+        return log_record
 
-        for handler in self.logger.handlers:
-            handler.handle(log_record)
+    def emit_batch(self, entries: Sequence[Tuple[int, str, Dict[str, Any]]]) -> None:
+        """
+        Log several structured messages, checking each level once
+
+        Args:
+            entries: (level, message, keyword arguments for log) tuples, in order
+        """
+        records = [
+            self._make_record(level, msg, **kwargs) for level, msg, kwargs in entries if self.logger.isEnabledFor(level)
+        ]
+        for record in records:
+            self.logger.handle(record)
+
+    def is_enabled_for(self, level: int) -> bool:
+        """Check whether a message at the given level would be emitted"""
+        return self.logger.isEnabledFor(level)
+
+    def close(self) -> None:
+        """Write out queued file records and stop the background writer"""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+            atexit.unregister(self.close)
 
     def format_section(self, title: str, content: str) -> str:
         """Format a section with separators and title"""
@@ -249,4 +298,29 @@ class AgentLogger:
         self.log(logging.CRITICAL, msg, **kwargs)
 
 
-__all__ = ["AgentLogger", "LogConfig", "TyperLogger"]
+# Loggers shared by every agent with the same name and configuration
+_AGENT_LOGGERS: Dict[Tuple[str, str], AgentLogger] = {}
+
+
+def get_agent_logger(name: str, config: LogConfig) -> AgentLogger:
+    """
+    Get the logger for a name and configuration, creating it on first use
+
+    Agents configured alike share one logger, so its handlers and log file are set
+    up once rather than per agent.
+
+    Args:
+        name: Logger name
+        config: Logging configuration
+
+    Returns:
+        Shared AgentLogger instance
+    """
+    key = (name, config.model_dump_json())
+    logger = _AGENT_LOGGERS.get(key)
+    if logger is None:
+        logger = _AGENT_LOGGERS[key] = AgentLogger(name, config)
+    return logger
+
+
+__all__ = ["AgentLogger", "LogConfig", "TyperLogger", "get_agent_logger"]
@@ -2,8 +2,9 @@
 Base logger implementation
 """
 
+import logging
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Sequence, Tuple
 
 from pydantic import BaseModel
 
@@ -28,6 +29,22 @@ class AgentLogger(ABC):
         self.name = name
         self.config = config
 
+    def is_enabled_for(self, level: int) -> bool:
+        """Check whether a message at the given level would be emitted"""
+        return level >= getattr(logging, self.config.level.upper(), logging.INFO)
+
+    def emit_batch(self, entries: Sequence[Tuple[int, str, Dict[str, Any]]]) -> None:
+        """Log several messages given as (level, message, context) tuples, in order"""
+        methods = {
+            logging.DEBUG: self.debug,
+            logging.INFO: self.info,
+            logging.WARNING: self.warning,
+            logging.ERROR: self.error,
+            logging.CRITICAL: self.critical,
+        }
+        for level, message, context in entries:
+            methods.get(level, self.info)(message, **context)
+
     @abstractmethod
     def debug(self, message: str, **context: Any) -> None:
         """Log debug message"""
@@ -2,6 +2,7 @@
 Typer-based logger implementation for enhanced CLI experience
 """
 
+import logging
 import time
 from datetime import datetime
 from typing import Any, Dict, Optional
@@ -76,6 +77,10 @@ class TyperLogger(AgentLogger):
             self._spinner_task_id = None
             self._spinner_text = None
 
+    def is_enabled_for(self, level: int) -> bool:
+        """Check whether a message at the given level would be emitted"""
+        return level > logging.DEBUG or self.config.level == "DEBUG"
+
     def debug(self, message: str, **context: Any) -> None:
         """Log debug message"""
         if self.config.level == "DEBUG":
@@ -2,10 +2,16 @@
 JSON utilities for state management
 """
 
+import json
 from datetime import datetime
 from json import JSONEncoder
 from typing import Any
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    orjson = None
+
 
 class DateTimeJSONEncoder(JSONEncoder):
     """JSON encoder that can handle datetime objects"""
@@ -16,6 +22,45 @@ class DateTimeJSONEncoder(JSONEncoder):
         return super().default(obj)
 
 
+def _orjson_default(obj: Any) -> Any:
+    """orjson fallback encoder, tagging datetimes the same way as DateTimeJSONEncoder"""
+    if isinstance(obj, datetime):
+        return {"__type__": "datetime", "value": obj.isoformat()}
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any, indent: bool = False, newline: bool = False) -> bytes:
+    """
+    Encode an object as UTF-8 JSON, tagging datetimes like DateTimeJSONEncoder
+
+    Uses orjson when installed and the stdlib encoder otherwise; the output decodes
+    with json_decoder_hook either way.
+
+    Args:
+        obj: Object to encode
+        indent: Pretty-print with two-space indentation
+        newline: Terminate the output with a newline
+
+    Returns:
+        Encoded JSON bytes
+    """
+    if orjson is not None:
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if newline:
+            option |= orjson.OPT_APPEND_NEWLINE
+        return orjson.dumps(obj, default=_orjson_default, option=option)
+
+    text = json.dumps(obj, indent=2 if indent else None, cls=DateTimeJSONEncoder)
+    return (text + "\n" if newline else text).encode()
+
+
+def dumps_line(obj: Any) -> bytes:
+    """Encode an object as one newline-terminated line of UTF-8 JSON"""
+    return dumps(obj, newline=True)
+
+
 def json_decoder_hook(obj: dict) -> Any:
     """Hook for decoding special JSON objects"""
     if "__type__" in obj:
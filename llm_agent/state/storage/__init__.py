@@ -3,6 +3,7 @@ State persistence and checkpoint system
 """
 
 import json
+import os
 import sqlite3
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
@@ -10,7 +11,7 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
-from ..json_utils import DateTimeJSONEncoder, json_decoder_hook
+from ..json_utils import dumps, dumps_line, json_decoder_hook
 
 
 @dataclass
@@ -25,6 +26,36 @@ class Checkpoint:
     parent_id: Optional[str] = None  # Previous checkpoint ID
 
 
+# State list fields that append-only events extend
+_EVENT_LIST_FIELDS = {
+    "message": "messages",
+    "user_input": "user_inputs",
+    "tool_execution": "tool_executions",
+}
+
+
+def apply_state_events(state: Dict[str, Any], events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Replay incremental state events over a state dictionary, in place
+
+    Events are dicts with a "type" and its "data": "message", "user_input" and
+    "tool_execution" append one serialized record, "context" merges a dict of updates.
+
+    Args:
+        state: State dictionary to update
+        events: Events in the order they happened
+
+    Returns:
+        The updated state dictionary
+    """
+    for event in events:
+        if event["type"] == "context":
+            state.setdefault("context", {}).update(event["data"])
+        else:
+            state.setdefault(_EVENT_LIST_FIELDS[event["type"]], []).append(event["data"])
+    return state
+
+
 class StateStorage(ABC):
     """Abstract base class for state storage implementations"""
 
@@ -38,6 +69,22 @@ class StateStorage(ABC):
         """Load task state"""
         pass
 
+    def append_events(self, task_id: str, events: List[Dict[str, Any]]) -> None:
+        """
+        Persist incremental changes to a stored task state (see apply_state_events)
+
+        The default rewrites the full state; backends override this with a real append.
+        """
+        state = self.load_state(task_id) or {}
+        self.save_state(task_id, apply_state_events(state, events))
+
+    def snapshot_state(self, task_id: str, state: Dict[str, Any]) -> None:
+        """Store a full task state, superseding any appended events"""
+        self.save_state(task_id, state)
+
+    def close(self) -> None:  # noqa: B027 - optional hook, a no-op by default
+        """Release any open files or connections held by the storage"""
+
     @abstractmethod
     def create_checkpoint(self, task_id: str, description: str) -> Checkpoint:
         """Create a checkpoint of current state"""
@@ -63,16 +110,25 @@ class StateStorage(ABC):
         """Search task history with relevance scores"""
         pass
 
+    def is_empty(self) -> bool:
+        """Cheaply check whether no task history has been stored yet"""
+        return False
+
 
 class JsonStateStorage(StateStorage):
     """JSON file-based state storage"""
 
+    # Event logs larger than this (in bytes) are folded back into a snapshot
+    COMPACT_THRESHOLD = 1 << 20
+
     def __init__(self, base_path: Path):
         """Initialize with base storage path"""
         self.base_path = base_path
         self.state_path = base_path / "states"
         self.checkpoint_path = base_path / "checkpoints"
         self.context_path = base_path / "context"
+        # Append-only descriptors for open event logs, keyed by task ID
+        self._event_fds: Dict[str, int] = {}
 
         # Create directories
         self.state_path.mkdir(parents=True, exist_ok=True)
@@ -82,28 +138,60 @@ class JsonStateStorage(StateStorage):
     def save_state(self, task_id: str, state: Dict[str, Any]) -> None:
         """Save task state to JSON file"""
         path = self.state_path / f"{task_id}.json"
-        with open(path, "w") as f:
-            json.dump(state, f, indent=2, cls=DateTimeJSONEncoder)
+        path.write_bytes(dumps(state, indent=True))
 
         # Save messages separately to maintain searchability
         messages_path = self.state_path / f"{task_id}_messages.json"
-        with open(messages_path, "w") as f:
-            json.dump(
-                {"messages": state.get("messages", [])},
-                f,
-                indent=2,
-                cls=DateTimeJSONEncoder,
-            )
+        messages_path.write_bytes(dumps({"messages": state.get("messages", [])}, indent=True))
 
         # Save context
         context_path = self.context_path / f"{task_id}_context.json"
-        with open(context_path, "w") as f:
-            json.dump(
-                {"context": state.get("context", {})},
-                f,
-                indent=2,
-                cls=DateTimeJSONEncoder,
-            )
+        context_path.write_bytes(dumps({"context": state.get("context", {})}, indent=True))
+
+    def _events_path(self, task_id: str) -> Path:
+        """Path of the append-only event log written since the last snapshot"""
+        return self.state_path / f"{task_id}_events.jsonl"
+
+    def _events_fd(self, task_id: str) -> int:
+        """Get the task's event log descriptor, opening it for appending on first use"""
+        fd = self._event_fds.get(task_id)
+        if fd is None:
+            flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, "O_CLOEXEC", 0)
+            fd = self._event_fds[task_id] = os.open(self._events_path(task_id), flags, 0o644)
+        return fd
+
+    def _close_events(self, task_id: str) -> None:
+        """Close the task's event log descriptor if it is open"""
+        fd = self._event_fds.pop(task_id, None)
+        if fd is not None:
+            os.close(fd)
+
+    def append_events(self, task_id: str, events: List[Dict[str, Any]]) -> None:
+        """Append state events to the task's JSON lines log in a single write"""
+        fd = self._events_fd(task_id)
+        data = memoryview(b"".join(dumps_line(event) for event in events))
+        while data:
+            data = data[os.write(fd, data) :]
+
+        if os.fstat(fd).st_size > self.COMPACT_THRESHOLD:
+            self.compact(task_id)
+
+    def snapshot_state(self, task_id: str, state: Dict[str, Any]) -> None:
+        """Write the full state and drop the event log it supersedes"""
+        self.save_state(task_id, state)
+        self._close_events(task_id)
+        self._events_path(task_id).unlink(missing_ok=True)
+
+    def compact(self, task_id: str) -> None:
+        """Fold the task's event log into a fresh snapshot"""
+        state = self.load_state(task_id)
+        if state is not None:
+            self.snapshot_state(task_id, state)
+
+    def close(self) -> None:
+        """Close all open event logs"""
+        for task_id in list(self._event_fds):
+            self._close_events(task_id)
 
     def load_state(self, task_id: str) -> Optional[Dict[str, Any]]:
         """Load task state from JSON file"""
@@ -113,23 +201,30 @@ class JsonStateStorage(StateStorage):
 
         state = {}
         # Load main state
-        with open(path) as f:
+        with open(path, "rb") as f:
             state = json.load(f, object_hook=json_decoder_hook)
 
         # Load messages if they exist
         messages_path = self.state_path / f"{task_id}_messages.json"
         if messages_path.exists():
-            with open(messages_path) as f:
+            with open(messages_path, "rb") as f:
                 messages_data = json.load(f, object_hook=json_decoder_hook)
                 state["messages"] = messages_data.get("messages", [])
 
         # Load context if it exists
         context_path = self.context_path / f"{task_id}_context.json"
         if context_path.exists():
-            with open(context_path) as f:
+            with open(context_path, "rb") as f:
                 context_data = json.load(f, object_hook=json_decoder_hook)
                 state["context"] = context_data.get("context", {})
 
+        # Replay changes appended since the last snapshot
+        events_path = self._events_path(task_id)
+        if events_path.exists():
+            with open(events_path, "rb") as f:
+                events = [json.loads(line, object_hook=json_decoder_hook) for line in f if line.strip()]
+            apply_state_events(state, events)
+
         return state
 
     def create_checkpoint(self, task_id: str, description: str) -> Checkpoint:
@@ -154,7 +249,7 @@ class JsonStateStorage(StateStorage):
 
         # Save checkpoint
         path = self.checkpoint_path / f"{checkpoint.id}.json"
-        with open(path, "w") as f:
+        with open(path, "wb") as f:
             checkpoint_data = {
                 "id": checkpoint.id,
                 "timestamp": checkpoint.timestamp.isoformat(),
@@ -163,7 +258,7 @@ class JsonStateStorage(StateStorage):
                 "state": checkpoint.state,
                 "parent_id": checkpoint.parent_id,
             }
-            json.dump(checkpoint_data, f, indent=2, cls=DateTimeJSONEncoder)
+            f.write(dumps(checkpoint_data, indent=True))
 
         return checkpoint
 
@@ -173,7 +268,7 @@ class JsonStateStorage(StateStorage):
         if not path.exists():
             raise ValueError(f"Checkpoint {checkpoint_id} not found")
 
-        with open(path) as f:
+        with open(path, "rb") as f:
             data = json.load(f, object_hook=json_decoder_hook)
             self.save_state(data["task_id"], data["state"])
             return data["state"]
@@ -182,7 +277,7 @@ class JsonStateStorage(StateStorage):
         """List checkpoints for task"""
         checkpoints = []
         for path in self.checkpoint_path.glob(f"{task_id}_*.json"):
-            with open(path) as f:
+            with open(path, "rb") as f:
                 data = json.load(f)
                 checkpoints.append(
                     Checkpoint(
@@ -230,6 +325,10 @@ class JsonStateStorage(StateStorage):
         related.sort(key=lambda x: x["similarity"], reverse=True)
         return related[:limit]
 
+    def is_empty(self) -> bool:
+        """Check for stored message files, stopping at the first one"""
+        return next(self.state_path.glob("*_messages.json"), None) is None
+
     def search_task_history(self, query: str, limit: int = 10) -> List[Tuple[str, float]]:
         """Search task history with relevance scores"""
         results = []
@@ -237,7 +336,7 @@ class JsonStateStorage(StateStorage):
         # Search through all message files
         for path in self.state_path.glob("*_messages.json"):
             task_id = path.name.replace("_messages.json", "")
-            with open(path) as f:
+            with open(path, "rb") as f:
                 messages = json.load(f).get("messages", [])
 
             # Simple relevance scoring based on term frequency
@@ -341,7 +440,7 @@ class SqliteStateStorage(StateStorage):
         """Save task state to database"""
         with sqlite3.connect(self.db_path) as conn:
             # Save main state
-            state_json = json.dumps(state, cls=DateTimeJSONEncoder)
+            state_json = dumps(state).decode()
             conn.execute(
                 """
                 INSERT OR REPLACE INTO states (task_id, state, updated_at)
@@ -350,43 +449,74 @@ class SqliteStateStorage(StateStorage):
                 (task_id, state_json, datetime.utcnow().isoformat()),
             )
 
-            # Save messages
+            # Save messages; the state is complete, so it replaces the stored conversation
             if "messages" in state:
-                for msg in state["messages"]:
-                    conn.execute(
-                        """
-                        INSERT INTO messages
-                        (task_id, role, content, timestamp, metadata)
-                        VALUES (?, ?, ?, ?, ?)
-                        """,
-                        (
-                            task_id,
-                            msg["role"],
-                            msg["content"],
-                            msg["timestamp"].isoformat(),
-                            json.dumps(msg.get("metadata", {})),
-                        ),
-                    )
+                conn.execute("DELETE FROM messages WHERE task_id = ?", (task_id,))
+                self._insert_messages(conn, task_id, state["messages"])
 
             # Save context
             if "context" in state:
-                for key, value in state["context"].items():
-                    conn.execute(
-                        """
-                        INSERT OR REPLACE INTO context
-                        (task_id, key, value, timestamp)
-                        VALUES (?, ?, ?, ?)
-                    """,
-                        (
-                            task_id,
-                            key,
-                            json.dumps(value, cls=DateTimeJSONEncoder),
-                            datetime.utcnow().isoformat(),
-                        ),
-                    )
+                self._upsert_context(conn, task_id, state["context"])
+
+            conn.commit()
+
+    def append_events(self, task_id: str, events: List[Dict[str, Any]]) -> None:
+        """Persist incremental changes, inserting only the new message rows"""
+        messages = [event["data"] for event in events if event["type"] == "message"]
+        context: Dict[str, Any] = {}
+        for event in events:
+            if event["type"] == "context":
+                context.update(event["data"])
+
+        with sqlite3.connect(self.db_path) as conn:
+            # Messages and context live in their own tables; the rest goes into the state row
+            row = conn.execute("SELECT state FROM states WHERE task_id = ?", (task_id,)).fetchone()
+            state = json.loads(row[0], object_hook=json_decoder_hook) if row else {}
+            apply_state_events(state, [event for event in events if event["type"] != "message"])
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO states (task_id, state, updated_at)
+                VALUES (?, ?, ?)
+            """,
+                (task_id, dumps(state).decode(), datetime.utcnow().isoformat()),
+            )
 
+            self._insert_messages(conn, task_id, messages)
+            self._upsert_context(conn, task_id, context)
             conn.commit()
 
+    def _insert_messages(self, conn: sqlite3.Connection, task_id: str, messages: List[Dict[str, Any]]) -> None:
+        """Insert message rows for a task"""
+        conn.executemany(
+            """
+            INSERT INTO messages
+            (task_id, role, content, timestamp, metadata)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [
+                (
+                    task_id,
+                    msg["role"],
+                    msg["content"],
+                    msg["timestamp"].isoformat(),
+                    dumps(msg.get("metadata", {})).decode(),
+                )
+                for msg in messages
+            ],
+        )
+
+    def _upsert_context(self, conn: sqlite3.Connection, task_id: str, context: Dict[str, Any]) -> None:
+        """Insert or replace context rows for a task"""
+        now = datetime.utcnow().isoformat()
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO context
+            (task_id, key, value, timestamp)
+            VALUES (?, ?, ?, ?)
+        """,
+            [(task_id, key, dumps(value).decode(), now) for key, value in context.items()],
+        )
+
     def load_state(self, task_id: str) -> Optional[Dict[str, Any]]:
         """Load task state from database"""
         with sqlite3.connect(self.db_path) as conn:
@@ -474,6 +604,11 @@ class SqliteStateStorage(StateStorage):
 
             return related
 
+    def is_empty(self) -> bool:
+        """Check whether any messages have been stored"""
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute("SELECT 1 FROM messages LIMIT 1").fetchone() is None
+
     def search_task_history(self, query: str, limit: int = 10) -> List[Tuple[str, float]]:
         """Search task history with relevance scores"""
         with sqlite3.connect(self.db_path) as conn:
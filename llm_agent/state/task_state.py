@@ -5,7 +5,7 @@ Task state management
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, PrivateAttr
 
 
 class Message(BaseModel):
@@ -66,6 +66,33 @@ class TaskState(BaseModel):
     related_tasks: List[RelatedTask] = []  # Connected tasks
     context: Dict[str, Any] = {}  # Persistent context storage
 
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    # Serialized copy of the state, kept current by the mutators once first built
+    _shadow: Optional[Dict[str, Any]] = PrivateAttr(default=None)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if self._shadow is not None and name in type(self).model_fields:
+            self._shadow[name] = self.model_dump(include={name})[name]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the state as a dict, equivalent to ``dict()``
+
+        The dict is built once and then updated in place as the state changes, so each
+        change costs only the serialization of what changed. It is shared and must be
+        treated as read-only; copy it to keep a point-in-time view.
+        """
+        if self._shadow is None:
+            self._shadow = self.model_dump()
+        return self._shadow
+
+    def _shadow_append(self, field: str, item: BaseModel) -> None:
+        """Mirror an item appended to a list field into the snapshot"""
+        if self._shadow is not None:
+            self._shadow[field].append(item.model_dump())
+
     def start_new_task(self, task: str, task_id: str) -> None:
         """Start a new task"""
         self.task = task
@@ -98,6 +125,7 @@ class TaskState(BaseModel):
                 timestamp=datetime.utcnow(),
             )
         )
+        self._shadow_append("tool_executions", self.tool_executions[-1])
 
     def add_message(self, role: str, content: str, metadata: Optional[Dict[str, Any]] = None) -> None:
         """Add a message to the conversation history"""
@@ -109,10 +137,12 @@ class TaskState(BaseModel):
                 metadata=metadata or {},
             )
         )
+        self._shadow_append("messages", self.messages[-1])
 
     def add_user_input(self, content: str, metadata: Optional[Dict[str, Any]] = None) -> None:
         """Record user input with optional metadata"""
         self.user_inputs.append(UserInput(content=content, timestamp=datetime.utcnow(), metadata=metadata or {}))
+        self._shadow_append("user_inputs", self.user_inputs[-1])
 
     def add_related_task(self, task_id: str, description: str, relevance_score: float, completed: bool) -> None:
         """Add a related task reference"""
@@ -125,10 +155,13 @@ class TaskState(BaseModel):
                 timestamp=datetime.utcnow(),
             )
         )
+        self._shadow_append("related_tasks", self.related_tasks[-1])
 
     def update_context(self, updates: Dict[str, Any]) -> None:
         """Update the persistent context"""
         self.context.update(updates)
+        if self._shadow is not None:
+            self._shadow["context"] = self.model_dump(include={"context"})["context"]
 
     def get_context(self, key: str, default: Any = None) -> Any:
         """Get a value from the context"""
@@ -193,8 +226,3 @@ class TaskState(BaseModel):
     def increment_auto_approvals(self) -> None:
         """Increment the consecutive auto-approvals counter"""
         self.consecutive_auto_approvals += 1
-
-    class Config:
-        """Pydantic config"""
-
-        arbitrary_types_allowed = True
@@ -3,12 +3,16 @@ File operation tools implementation
 """
 
 import os
+import re
 import subprocess
 from pathlib import Path
 from typing import Any, Dict, List, Set, Tuple
 
 from .base import BaseTool, ToolResult
 
+# Search/replace block accepted by ReplaceInFileTool
+_REPLACE_BLOCK_RE = re.compile(r"<<<<<<< SEARCH\n(.*?)\n=======\n(.*?)\n>>>>>>> REPLACE", re.DOTALL)
+
 
 class ReadFileTool(BaseTool):
     """Tool to read file contents"""
@@ -281,20 +285,17 @@ class ReplaceInFileTool(BaseTool):
             with open(file_path, encoding="utf-8") as f:
                 original_content = f.read()
 
-            # Parse the replacement format to extract search and replace content
-            import re
-
-            pattern = r"<<<<<<< SEARCH\n(.*?)\n=======\n(.*?)\n>>>>>>> REPLACE"
-            matches = re.findall(pattern, content, re.DOTALL)
+            # Parse the replacement format to extract search and replace content; only the first block is used
+            match = _REPLACE_BLOCK_RE.search(content)
 
-            if not matches:
+            if not match:
                 return ToolResult(
                     success=False,
                     message="Invalid replacement format. Use git-like comparison markers.",
                     data=None,
                 )
 
-            search_text, replacement_text = matches[0]
+            search_text, replacement_text = match.groups()
 
             # Perform the replacement
             if count > 0:
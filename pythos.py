@@ -5,27 +5,28 @@ A command-line interface for the Cline LLM Agent Framework.
 """
 
 import asyncio
+import sys
+import threading
 import traceback
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
 import typer
-from dotenv import load_dotenv
-from rich.console import Console
-from rich.panel import Panel
-from rich.prompt import Confirm, Prompt
-from rich.table import Table
-from rich.traceback import install as install_rich_traceback
-
-from llm_agent.agent import Agent
-from llm_agent.callbacks import ConsoleApprovalCallback
-from llm_agent.config import AgentConfig
-from llm_agent.logging import LogConfig, TyperLogger
-
-# Install rich traceback handler
-install_rich_traceback(show_locals=True)
-
-load_dotenv()
+import yaml
+from rich.console import Console, Group
+
+# The agent stack (LLM client, storage, tools) and most Rich widgets are imported
+# where they are used, so `--help` and argument errors stay cheap
+if TYPE_CHECKING:
+    from llm_agent.agent import Agent
+    from llm_agent.config import AgentConfig
+
+try:
+    import uvloop
+except ImportError:  # pragma: no cover - uvloop is unavailable on Windows
+    uvloop = None
+
 # Initialize Typer app
 app = typer.Typer(
     name="cline",
@@ -36,33 +37,83 @@ app = typer.Typer(
 # Initialize Rich console
 console = Console()
 
+_rich_traceback_installed = False
 
-def display_error(error: Exception, context: str = "Task execution failed"):
-    """Display error with rich formatting"""
-    console.print(f"\n[bold red]Error: {context}[/bold red]")
-    console.print(Panel(str(error), title="Error Details", border_style="red", title_align="left"))
 
-    # Show traceback in a panel
-    console.print(
+def _install_rich_traceback(show_locals: bool = False):
+    """Install the rich traceback handler on first use, keeping rich.traceback off the startup path
+
+    Locals are only shown on request (``--debug``): repr-ing every frame's prompts and
+    message histories makes each traceback slow and very large.
+    """
+    global _rich_traceback_installed
+    if not _rich_traceback_installed:
+        from rich.traceback import install
+
+        install(show_locals=show_locals)
+        _rich_traceback_installed = True
+
+
+def _error_key(error: BaseException) -> Tuple:
+    """Identify an error by type, message and raising frames across its exception chain"""
+    key = []
+    seen = set()
+    current: Optional[BaseException] = error
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        frames = tuple((f.f_code.co_filename, lineno) for f, lineno in traceback.walk_tb(current.__traceback__))
+        key.append((type(current).__name__, str(current), frames))
+        current = current.__cause__ or current.__context__
+    return tuple(key)
+
+
+_ERROR_RENDER_CACHE: "OrderedDict[Tuple, Group]" = OrderedDict()
+_ERROR_RENDER_CACHE_SIZE = 32
+
+
+def _render_error(error: BaseException, context: str) -> Group:
+    """Build the error display; identical recurring errors reuse the rendered group"""
+    from rich.panel import Panel
+
+    key = (context, _error_key(error))
+    rendered = _ERROR_RENDER_CACHE.get(key)
+    if rendered is not None:
+        _ERROR_RENDER_CACHE.move_to_end(key)
+        return rendered
+
+    rendered = Group(
+        f"\n[bold red]Error: {context}[/bold red]",
+        Panel(str(error), title="Error Details", border_style="red", title_align="left"),
         Panel(
-            "".join(traceback.format_exception(type(error), error, error.__traceback__)),
+            "".join(traceback.TracebackException.from_exception(error, capture_locals=False).format()),
             title="Traceback",
             border_style="red",
             title_align="left",
-        )
+        ),
     )
+    _ERROR_RENDER_CACHE[key] = rendered
+    if len(_ERROR_RENDER_CACHE) > _ERROR_RENDER_CACHE_SIZE:
+        _ERROR_RENDER_CACHE.popitem(last=False)
+    return rendered
+
+
+def display_error(error: Exception, context: str = "Task execution failed"):
+    """Display error with rich formatting"""
+    _install_rich_traceback()
+    # Render heading, details and traceback as one group so they go out in a single write
+    console.print(_render_error(error, context))
 
 
-def load_config(config_path: Path) -> AgentConfig:
+def load_config(config_path: Path) -> "AgentConfig":
     """Load configuration from YAML file"""
-    import yaml
+    from llm_agent.config import AgentConfig
 
     if not config_path.exists():
         console.print(f"[red]Error: Config file not found at {config_path}[/red]")
         raise typer.Exit(1)
 
     try:
-        return AgentConfig.from_yaml(config_path)
+        return AgentConfig.from_yaml(str(config_path))
     except yaml.YAMLError as e:
         console.print(f"[red]Error: Invalid YAML configuration: {str(e)}[/red]")
         raise typer.Exit(1) from e
@@ -73,6 +124,8 @@ def load_config(config_path: Path) -> AgentConfig:
 
 def display_welcome():
     """Display welcome message"""
+    from rich.panel import Panel
+
     console.print(
         Panel.fit(
             "[bold cyan]Welcome to Cline LLM Agent Framework[/bold cyan]\n"
@@ -83,49 +136,108 @@ def display_welcome():
     )
 
 
-def display_task_history(agent: Agent):
-    """Display recent task history"""
-    console.print("\n[bold cyan]Recent Tasks:[/bold cyan]")
+class TaskHistoryCache:
+    """Recent task listing, re-read from storage only after a task has run"""
+
+    def __init__(self, agent: "Agent", limit: int = 5):
+        self.agent = agent
+        self.limit = limit
+        self._tasks: Optional[List[Dict[str, Any]]] = None
+        self._dirty = True
+
+    def invalidate(self) -> None:
+        """Mark the cached listing as stale"""
+        self._dirty = True
+
+    async def get(self) -> List[Dict[str, Any]]:
+        """Get recent tasks, hitting state storage only when the cache is stale"""
+        if self._dirty or self._tasks is None:
+            self._tasks = await self.agent.search_task_history("", limit=self.limit)
+            self._dirty = False
+        return self._tasks
+
+
+async def display_task_history(history: Awaitable[List[Dict[str, Any]]]):
+    """Display recent task history once the (possibly in-flight) lookup resolves"""
+    heading = "\n[bold cyan]Recent Tasks:[/bold cyan]"
 
     try:
         # Get recent tasks
-        tasks = asyncio.run(agent.search_task_history("", limit=5))
+        tasks = await history
 
         if not tasks:
-            console.print("[dim]No recent tasks found[/dim]")
+            console.print(Group(heading, "[dim]No recent tasks found[/dim]"))
             return
 
+        # Cell contents are already truncated, so pin column widths and skip
+        # Rich's per-cell measurement of long descriptions
+        from rich.table import Table
+
         table = Table(show_header=True, header_style="bold magenta")
-        table.add_column("Task ID", style="cyan")
-        table.add_column("Description", style="white")
-        table.add_column("Status", style="green")
+        table.add_column("Task ID", style="cyan", width=8, no_wrap=True)
+        table.add_column("Description", style="white", max_width=53, no_wrap=True)
+        table.add_column("Status", style="green", width=6, no_wrap=True)
         table.add_column("Duration", style="yellow")
 
+        add_row = table.add_row
         for task in tasks:
-            status = "✓" if task["completed"] else "✗"
-            status_color = "green" if task["completed"] else "red"
+            description = task["task"]
+            if len(description) > 50:
+                description = description[:50] + "..."
             duration = task.get("summary", {}).get("duration", "N/A")
 
-            table.add_row(
+            add_row(
                 task["task_id"][:8],
-                task["task"][:50] + "..." if len(task["task"]) > 50 else task["task"],
-                f"[{status_color}]{status}[/{status_color}]",
+                description,
+                "[green]✓[/green]" if task["completed"] else "[red]✗[/red]",
                 str(duration),
             )
 
-        console.print(table)
+        console.print(Group(heading, table))
     except Exception as e:
+        console.print(heading)
         display_error(e, "Failed to display task history")
         console.print("[yellow]Continuing with task input...[/yellow]")
 
 
-def get_task_input() -> Optional[str]:
+async def ask_in_thread(prompt: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking Rich prompt off the event loop thread.
+
+    A daemon thread is used instead of the default executor so that an
+    interrupted prompt never blocks interpreter shutdown.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def resolve(result: Any = None, error: Optional[BaseException] = None) -> None:
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def worker() -> None:
+        try:
+            result = prompt(*args, **kwargs)
+        except BaseException as e:
+            loop.call_soon_threadsafe(resolve, None, e)
+        else:
+            loop.call_soon_threadsafe(resolve, result)
+
+    threading.Thread(target=worker, daemon=True).start()
+    return await future
+
+
+async def get_task_input() -> Optional[str]:
     """Get task input from user"""
     console.print("\n[bold cyan]Enter your task:[/bold cyan]")
     console.print("[dim]Press Ctrl+C to exit[/dim]")
 
+    from rich.prompt import Prompt
+
     try:
-        task = Prompt.ask("Task")
+        task = await ask_in_thread(Prompt.ask, "Task")
         return task.strip() if task else None
     except KeyboardInterrupt:
         return None
@@ -134,38 +246,63 @@ def get_task_input() -> Optional[str]:
         return None
 
 
+async def confirm(message: str) -> bool:
+    """Ask a yes/no question without blocking the event loop"""
+    from rich.prompt import Confirm
+
+    return await ask_in_thread(Confirm.ask, message)
+
+
 def display_task_result(result: any):
     """Display task result"""
-    console.print("\n[bold cyan]Task Result:[/bold cyan]")
-    console.print(Panel(str(result), title="Result", border_style="green"))
+    from rich.panel import Panel
 
+    console.print(
+        Group("\n[bold cyan]Task Result:[/bold cyan]", Panel(str(result), title="Result", border_style="green"))
+    )
 
-@app.command()
-def run(
-    config_path: Path = typer.Option(  # noqa: B008
-        "config.yml",
-        "--config",
-        "-c",
-        help="Path to configuration file",
-        exists=True,
-        file_okay=True,
-        dir_okay=False,
-        resolve_path=True,
-    ),
-):
-    """Run the Cline CLI in interactive mode"""
-    try:
-        # Load configuration
-        config = load_config(config_path)
 
-        # Initialize logger
-        logger = TyperLogger(
-            "cline",
-            LogConfig(level="INFO", console_logging=True, file_logging=True, use_colors=True, show_separators=True),
-        )
+def _run_session(main: Awaitable[None]) -> None:
+    """Run a coroutine on one fresh event loop (uvloop when available), closing it afterwards"""
+    if sys.version_info >= (3, 11):
+        loop_factory = uvloop.new_event_loop if uvloop is not None else None
+        with asyncio.Runner(loop_factory=loop_factory) as runner:
+            runner.run(main)
+        return
+
+    # asyncio.Runner is 3.11+; manage the loop by hand on older interpreters
+    loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+    try:
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(main)
+    finally:
+        try:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+
+async def _run_async(config_path: Path) -> None:
+    """Interactive task loop, executed on a single persistent event loop"""
+    from llm_agent.agent import Agent
+    from llm_agent.callbacks import ConsoleApprovalCallback
+    from llm_agent.logging import LogConfig, TyperLogger
+
+    # Load configuration
+    config = load_config(config_path)
+
+    # Initialize logger
+    logger = TyperLogger(
+        "cline",
+        LogConfig(level="INFO", console_logging=True, file_logging=True, use_colors=True, show_separators=True),
+    )
 
-        # Initialize agent
-        agent = Agent(config, approval_callback=ConsoleApprovalCallback())
+    # Initialize agent, kept open across every task in the session
+    async with Agent(config, approval_callback=ConsoleApprovalCallback()) as agent:
+        # Fetch recent tasks in the background while the welcome message renders
+        history = TaskHistoryCache(agent)
+        history_task: Optional[asyncio.Task] = asyncio.create_task(history.get())
 
         # Display welcome message
         display_welcome()
@@ -173,28 +310,36 @@ def run(
         while True:
             try:
                 # Display task history
-                display_task_history(agent)
+                if history_task is None:
+                    history_task = asyncio.create_task(history.get())
+                await display_task_history(history_task)
+                history_task = None
 
                 # Get task input
-                task = get_task_input()
+                task = await get_task_input()
                 if task is None:
                     break
 
                 # Execute task
                 try:
+                    # Executing a task persists new state, successful or not
+                    history.invalidate()
                     logger.start_task("Executing task...")
-                    result = asyncio.run(agent.execute_task(task))
+                    result = await agent.execute_task(task)
                     logger.end_task("Task completed", success=True)
                     display_task_result(result)
                 except Exception as e:
                     logger.error(f"Task execution failed: {str(e)}")
                     display_error(e, "Task execution failed")
-                    if Confirm.ask("[yellow]Would you like to try again?[/yellow]"):
+                    if await confirm("[yellow]Would you like to try again?[/yellow]"):
                         continue
                     break
 
+                # Prefetch the next history listing while the user decides whether to continue
+                history_task = asyncio.create_task(history.get())
+
                 # Ask if user wants to continue
-                if not Confirm.ask("\n[cyan]Would you like to execute another task?[/cyan]"):
+                if not await confirm("\n[cyan]Would you like to execute another task?[/cyan]"):
                     break
 
             except KeyboardInterrupt:
@@ -202,11 +347,40 @@ def run(
                 break
             except Exception as e:
                 display_error(e, "Unexpected error occurred")
-                if not Confirm.ask("[yellow]Would you like to continue?[/yellow]"):
+                if not await confirm("[yellow]Would you like to continue?[/yellow]"):
                     break
 
-        console.print("\n[green]Thank you for using Cline![/green]")
+    console.print("\n[green]Thank you for using Cline![/green]")
+
 
+@app.command()
+def run(
+    config_path: Path = typer.Option(  # noqa: B008
+        "config.yml",
+        "--config",
+        "-c",
+        help="Path to configuration file",
+        exists=True,
+        file_okay=True,
+        dir_okay=False,
+        resolve_path=True,
+    ),
+    debug: bool = typer.Option(False, "--debug/--no-debug", help="Show local variables in tracebacks"),
+):
+    """Run the Cline CLI in interactive mode"""
+    if debug:
+        _install_rich_traceback(show_locals=True)
+
+    from llm_agent._dotenv_cache import load_dotenv_cached
+
+    load_dotenv_cached()
+
+    try:
+        # One loop for the whole session keeps HTTP connection pools warm across tasks
+        _run_session(_run_async(config_path))
+    except KeyboardInterrupt:
+        console.print("\n[yellow]Operation interrupted by user[/yellow]")
+        console.print("\n[green]Thank you for using Cline![/green]")
     except Exception as e:
         display_error(e, "Fatal error occurred")
         raise typer.Exit(1) from e
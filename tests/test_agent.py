@@ -2,13 +2,14 @@
 Tests for the LLM Agent
 """
 
+import asyncio
 from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
 from llm_agent import Agent, AgentConfig
-from llm_agent.llm.base import LLMAction
+from llm_agent.llm.base import LLMAction, ToolCall
 from llm_agent.tools.base import ToolResult
 
 
@@ -102,3 +103,145 @@ async def test_task_execution_failure(mock_agent):
 
     assert mock_agent.state.is_failed
     assert mock_agent.state.error_message == "Test error"
+
+
+@pytest.mark.asyncio
+async def test_agent_context_manager_closes_llm(mock_agent):
+    """Test that leaving the agent context releases the LLM provider"""
+    async with mock_agent as agent:
+        assert agent is mock_agent
+        mock_agent.llm.aclose.assert_not_awaited()
+
+    mock_agent.llm.aclose.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_closing_one_agent_keeps_shared_llm_open(mock_config):
+    """Test that agents sharing an LLM provider can be closed independently"""
+    first = Agent(mock_config)
+    second = Agent(mock_config)
+    provider = second.llm
+    assert first.llm is provider
+
+    await first.aclose()
+    assert not provider.is_closed()
+
+    provider.get_next_action = AsyncMock(
+        return_value=LLMAction(is_complete=True, result="Task completed successfully", thoughts="All done")
+    )
+    assert await second.execute_task("Test task") == "Task completed successfully"
+
+    await second.aclose()
+    assert provider.is_closed()
+
+
+@pytest.mark.asyncio
+async def test_task_execution_batches_state_saves(mock_agent):
+    """Test that state changes within an iteration are persisted together"""
+    mock_agent.llm.get_next_action = AsyncMock(
+        return_value=LLMAction(is_complete=True, result="Task completed successfully", thoughts="All done")
+    )
+    mock_agent.storage.get_related_tasks = MagicMock(return_value=[])
+    mock_agent.storage.save_state = MagicMock()
+
+    await mock_agent.execute_task("Test task")
+
+    # One write before asking the LLM, one final write with the completed state
+    assert mock_agent.storage.save_state.call_count == 2
+    final_state = mock_agent.storage.save_state.call_args.args[1]
+    assert final_state["is_complete"]
+    assert len(final_state["messages"]) == 3
+
+
+@pytest.mark.asyncio
+async def test_state_snapshot_tracks_state_changes(mock_agent):
+    """Test that the incrementally maintained state dict matches a full dump"""
+    snapshot = mock_agent._cached_state_dict()
+    assert snapshot == mock_agent.state.model_dump()
+
+    mock_agent.state.add_message("user", "Hello")
+    mock_agent.state.update_context({"key": "value"})
+    mock_agent.state.add_tool_result("test_tool", ToolResult(success=True, message="ok", data=None), {"arg": 1})
+    mock_agent.state.mark_complete()
+
+    assert mock_agent._cached_state_dict() is snapshot
+    assert snapshot == mock_agent.state.model_dump()
+    assert snapshot["messages"][-1]["content"] == "Hello"
+    assert snapshot["is_complete"]
+
+
+@pytest.mark.asyncio
+async def test_incremental_saves_replay_to_full_state(mock_agent):
+    """Test that appended state events load back into the full state"""
+    for i in range(3):
+        await mock_agent.save_message("user", f"Message {i}")
+    await mock_agent.update_context({"key": "value"})
+
+    loaded = mock_agent.storage.load_state(mock_agent.task_id)
+    assert [m["content"] for m in loaded["messages"]] == ["Message 0", "Message 1", "Message 2"]
+    assert loaded["context"]["key"] == "value"
+
+
+@pytest.mark.asyncio
+async def test_task_execution_runs_tool_calls_concurrently(mock_agent):
+    """Test that independent tool calls from one step run together and are recorded in order"""
+    running = 0
+    peak = 0
+
+    async def execute(args):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return ToolResult(success=True, message="Tool executed", data=args["n"])
+
+    mock_tool = MagicMock()
+    mock_tool.name = "test_tool"
+    mock_tool.execute = execute
+    mock_agent.register_tool(mock_tool)
+
+    mock_agent.llm.get_next_action = AsyncMock()
+    mock_agent.llm.get_next_action.side_effect = [
+        LLMAction(tool_calls=[ToolCall(name="test_tool", args={"n": n}) for n in range(3)], thoughts="Fan out"),
+        LLMAction(is_complete=True, result="Done", thoughts="All done"),
+    ]
+
+    assert await mock_agent.execute_task("Test task with tools") == "Done"
+    assert peak == 3
+    assert [te.result.data for te in mock_agent.state.tool_executions] == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_execute_tasks_runs_each_task_with_its_own_state(mock_agent):
+    """Test that batched tasks run concurrently without sharing task state"""
+    batches = []
+
+    async def next_actions(requests):
+        batches.append([task for task, _, _ in requests])
+        await asyncio.sleep(0.01)
+        return [
+            LLMAction(is_complete=True, result=f"Done: {state.task}", thoughts="All done") for _, state, _ in requests
+        ]
+
+    mock_agent.llm.get_next_actions = AsyncMock(side_effect=next_actions)
+
+    results = await mock_agent.execute_tasks(["Task A", "Task B", "Task C"], max_concurrency=2)
+
+    assert results == ["Done: Task A", "Done: Task B", "Done: Task C"]
+    # Tasks waiting on the model together share one get_next_actions call
+    assert sorted(batches[0]) == ["Task A", "Task B"]
+    assert sorted(task for batch in batches for task in batch) == ["Task A", "Task B", "Task C"]
+    mock_agent.llm.get_next_action.assert_not_called()
+    assert mock_agent.state.task is None
+
+
+@pytest.mark.asyncio
+async def test_execute_tasks_returns_provider_errors(mock_agent):
+    """Test that a failed batch is reported for each of its tasks"""
+    mock_agent.llm.get_next_actions = AsyncMock(side_effect=ValueError("Test error"))
+
+    results = await mock_agent.execute_tasks(["Task A", "Task B"])
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert mock_agent.state.task is None
@@ -0,0 +1,137 @@
+"""
+Tests for loading agent configuration from YAML
+"""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from llm_agent import config as config_module
+from llm_agent.config import AgentConfig, clear_config_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_config_cache():
+    """Start and finish each test with an empty config cache"""
+    clear_config_cache()
+    yield
+    clear_config_cache()
+
+
+@pytest.fixture
+def write_config(temp_dir):
+    """Write a YAML config into the temporary directory and return its path"""
+
+    def write(body: str = "", api_key: str = "test-key") -> str:
+        path = temp_dir / "config.yaml"
+        path.write_text(
+            f"llm_provider: openai\napi_key: {api_key}\nworking_directory: {temp_dir}\n{body}", encoding="utf-8"
+        )
+        return str(path)
+
+    return write
+
+
+@pytest.fixture
+def read_yaml():
+    """Count how often config files are actually parsed"""
+    with patch.object(config_module, "_read_yaml", wraps=config_module._read_yaml) as read:
+        yield read
+
+
+def test_from_yaml_reuses_parsed_config(write_config, read_yaml):
+    """Test that an unchanged file is parsed once and each call gets its own copy"""
+    path = write_config("rate_limit: 30\n")
+
+    first = AgentConfig.from_yaml(path)
+    second = AgentConfig.from_yaml(path)
+
+    assert read_yaml.call_count == 1
+    assert first == second
+    assert first is not second
+
+    first.logging.level = "ERROR"
+    assert AgentConfig.from_yaml(path).logging.level == second.logging.level
+
+
+def test_from_yaml_reloads_changed_file(write_config, read_yaml):
+    """Test that a new size or modification time invalidates the cached config"""
+    path = write_config("rate_limit: 30\n")
+    assert AgentConfig.from_yaml(path).rate_limit == 30
+
+    write_config("rate_limit: 300\n")
+    assert AgentConfig.from_yaml(path).rate_limit == 300
+    assert read_yaml.call_count == 2
+
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    AgentConfig.from_yaml(path)
+    assert read_yaml.call_count == 3
+
+
+def test_from_yaml_reloads_when_environment_changes(write_config, read_yaml, monkeypatch):
+    """Test that a cached config is only reused while the variables it used are unchanged"""
+    monkeypatch.setenv("PYTHOS_TEST_KEY", "first-key")
+    path = write_config(api_key="${PYTHOS_TEST_KEY}")
+    assert AgentConfig.from_yaml(path).api_key == "first-key"
+    assert AgentConfig.from_yaml(path).api_key == "first-key"
+    assert read_yaml.call_count == 1
+
+    monkeypatch.setenv("PYTHOS_TEST_KEY", "second-key")
+    assert AgentConfig.from_yaml(path).api_key == "second-key"
+    assert read_yaml.call_count == 2
+
+
+def test_from_yaml_reloads_in_another_working_directory(write_config, read_yaml, temp_dir, monkeypatch):
+    """Test that the cache is keyed on the current working directory"""
+    path = write_config()
+    AgentConfig.from_yaml(path)
+
+    monkeypatch.chdir(temp_dir)
+    AgentConfig.from_yaml(path)
+    assert read_yaml.call_count == 2
+
+
+def test_from_yaml_expands_env_vars_across_the_document(write_config, monkeypatch):
+    """Test whole-value and embedded ${VAR} references anywhere in the document"""
+    monkeypatch.setenv("PYTHOS_TEST_HOST", "example.com")
+    monkeypatch.setenv("PYTHOS_TEST_LEVEL", "WARNING")
+    monkeypatch.delenv("PYTHOS_TEST_UNSET", raising=False)
+    path = write_config(
+        "base_url: https://${PYTHOS_TEST_HOST}/v1\n"
+        "logging:\n"
+        "  level: ${PYTHOS_TEST_LEVEL}\n"
+        "  format: '%(message)s ${PYTHOS_TEST_UNSET}'\n"
+    )
+
+    config = AgentConfig.from_yaml(path)
+    assert config.base_url == "https://example.com/v1"
+    assert config.logging.level == "WARNING"
+    # Unset variables are kept verbatim inside longer strings
+    assert config.logging.format == "%(message)s ${PYTHOS_TEST_UNSET}"
+
+
+def test_from_yaml_whole_value_env_var_can_be_unset(write_config, monkeypatch):
+    """Test that a value consisting of one unset variable becomes None"""
+    monkeypatch.delenv("PYTHOS_TEST_UNSET", raising=False)
+    path = write_config("base_url: ${PYTHOS_TEST_UNSET}\n")
+
+    assert AgentConfig.from_yaml(path).base_url is None
+
+
+def test_from_yaml_requires_api_key_variable(write_config, monkeypatch):
+    """Test that an api_key referring to an unset variable is rejected"""
+    monkeypatch.delenv("PYTHOS_TEST_MISSING", raising=False)
+    path = write_config(api_key="${PYTHOS_TEST_MISSING}")
+
+    with pytest.raises(ValueError, match="PYTHOS_TEST_MISSING"):
+        AgentConfig.from_yaml(path)
+
+
+def test_read_yaml_handles_empty_file(temp_dir):
+    """Test that an empty file, which can't be memory-mapped, parses to None"""
+    path = temp_dir / "empty.yaml"
+    path.write_bytes(b"")
+
+    assert config_module._read_yaml(str(path)) is None
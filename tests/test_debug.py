@@ -0,0 +1,100 @@
+"""
+Tests for the debug session and breakpoints
+"""
+
+import pytest
+
+from llm_agent.debug import Breakpoint, BreakpointConfig, BreakpointType, DebugSession
+
+
+@pytest.fixture
+def session() -> DebugSession:
+    """Create an active debug session"""
+    session = DebugSession()
+    session.start()
+    return session
+
+
+def test_should_break_dispatches_on_type(session):
+    """Test that only breakpoints of the checked type fire"""
+    session.add_breakpoint("tools", BreakpointConfig(type=BreakpointType.TOOL))
+
+    assert session.should_break(BreakpointType.TOOL, {})
+    assert not session.should_break(BreakpointType.LLM, {})
+
+    session.add_breakpoint("llm", BreakpointConfig(type=BreakpointType.LLM))
+    assert session.should_break(BreakpointType.LLM, {})
+
+    session.remove_breakpoint("tools")
+    assert not session.should_break(BreakpointType.TOOL, {})
+
+
+def test_copied_session_uses_its_own_breakpoints(session):
+    """Test that a deep copy does not keep checking the original's breakpoints"""
+    session.add_breakpoint("tools", BreakpointConfig(type=BreakpointType.TOOL))
+    assert session.should_break(BreakpointType.TOOL, {})
+
+    copied = session.model_copy(deep=True)
+    copied.breakpoints["tools"].enabled = False
+
+    assert not copied.should_break(BreakpointType.TOOL, {})
+    assert session.should_break(BreakpointType.TOOL, {})
+
+
+def test_should_break_sees_breakpoints_assigned_directly(session):
+    """Test that breakpoints put straight into the dict are picked up"""
+    session.add_breakpoint("tools", BreakpointConfig(type=BreakpointType.TOOL))
+    assert not session.should_break(BreakpointType.STATE, {})
+
+    session.breakpoints["state"] = Breakpoint(type=BreakpointType.STATE)
+    assert session.should_break(BreakpointType.STATE, {})
+
+    session.breakpoints["tools"] = Breakpoint(type=BreakpointType.TOOL, enabled=False)
+    assert not session.should_break(BreakpointType.TOOL, {})
+
+
+def test_should_break_evaluates_conditions(session):
+    """Test that a condition decides whether its breakpoint fires"""
+    session.add_breakpoint(
+        "big_writes", BreakpointConfig(type=BreakpointType.TOOL, condition="len(context['args']) > 1")
+    )
+
+    assert session.should_break(BreakpointType.TOOL, {"args": {"a": 1, "b": 2}})
+    assert not session.should_break(BreakpointType.TOOL, {"args": {"a": 1}})
+
+
+def test_should_break_skips_broken_conditions(session):
+    """Test that conditions which don't compile or fail to evaluate never fire"""
+    session.add_breakpoint("syntax", BreakpointConfig(type=BreakpointType.TOOL, condition="len(context["))
+    session.add_breakpoint("missing_key", BreakpointConfig(type=BreakpointType.TOOL, condition="context['nope']"))
+
+    assert not session.should_break(BreakpointType.TOOL, {})
+
+
+def test_should_break_conditions_only_see_allowed_builtins(session):
+    """Test that conditions can't reach builtins outside the allowlist"""
+    session.add_breakpoint(
+        "escape", BreakpointConfig(type=BreakpointType.TOOL, condition="__import__('os').getcwd() is not None")
+    )
+    session.add_breakpoint("open_file", BreakpointConfig(type=BreakpointType.TOOL, condition="open('/dev/null')"))
+
+    assert not session.should_break(BreakpointType.TOOL, {})
+
+
+def test_should_break_ignores_disabled_and_inactive(session):
+    """Test that disabled breakpoints and inactive sessions never break"""
+    session.add_breakpoint("tools", BreakpointConfig(type=BreakpointType.TOOL, enabled=False))
+    assert not session.should_break(BreakpointType.TOOL, {})
+
+    session.breakpoints["tools"].enabled = True
+    assert session.should_break(BreakpointType.TOOL, {})
+
+    session.stop()
+    assert not session.should_break(BreakpointType.TOOL, {})
+
+
+def test_step_by_step_always_breaks(session):
+    """Test that step-by-step mode breaks without any breakpoints"""
+    session.step_by_step = True
+
+    assert session.should_break(BreakpointType.LLM, {})
@@ -2,15 +2,20 @@
 Tests for LLM Providers and related components
 """
 
+import asyncio
 import json
 import re
+import time
 import xml.etree.ElementTree as ET
 from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from llm_agent.llm.base import LLMAction
+from llm_agent.config import AgentConfig
+from llm_agent.llm import build_llm_provider, create_llm_provider, release_llm_provider
+from llm_agent.llm.base import LLMAction, ToolCall
+from llm_agent.llm.cache import CachedLLMProvider
 from llm_agent.llm.openai import OpenAIProvider
 from llm_agent.llm.rate_limiter import RateLimiter
 from llm_agent.state import TaskState
@@ -52,9 +57,7 @@ def mock_tool():
 @pytest.fixture
 def openai_provider():
     """Create an OpenAI provider for testing"""
-    with patch("openai.chat.completions.create"):
-        provider = OpenAIProvider(api_key="test-key", model="test-model", rpm=10)
-        return provider
+    return OpenAIProvider(api_key="test-key", model="test-model", rpm=10)
 
 
 @pytest.fixture
@@ -74,20 +77,49 @@ def patched_format_conversation_history(self, messages):
     return "\n".join(formatted)
 
 
-# Patch the method for tests
+# Patch the method for tests, keeping the real one for the tests that use Message objects
+format_conversation_history = OpenAIProvider._format_conversation_history
 OpenAIProvider._format_conversation_history = patched_format_conversation_history
 
 
 @pytest.mark.asyncio
 async def test_openai_provider_initialization():
     """Test OpenAI provider initialization"""
-    with patch("openai.chat.completions.create"):
-        provider = OpenAIProvider(api_key="test-key", model="test-model", rpm=10)
-        assert provider.api_key == "test-key"
-        assert provider.model == "test-model"
-        assert provider.tools == {}
-        assert isinstance(provider.rate_limiter, RateLimiter)
-        assert provider.rate_limiter.rpm == 10
+    provider = OpenAIProvider(api_key="test-key", model="test-model", rpm=10)
+    assert provider.api_key == "test-key"
+    assert provider.model == "test-model"
+    assert provider.tools == {}
+    assert isinstance(provider.rate_limiter, RateLimiter)
+    assert provider.rate_limiter.rpm == 10
+
+
+@pytest.mark.asyncio
+async def test_create_llm_provider_shares_instances(tmp_path):
+    """Test that identical configurations share a provider until it is closed"""
+    config = AgentConfig(llm_provider="openai", api_key="test-key", working_directory=tmp_path)
+
+    provider = create_llm_provider(config)
+    assert create_llm_provider(config.model_copy()) is provider
+    assert build_llm_provider(config) is not provider
+    assert create_llm_provider(config.model_copy(update={"rate_limit": 30})) is not provider
+
+    await provider.aclose()
+    assert create_llm_provider(config) is not provider
+
+
+@pytest.mark.asyncio
+async def test_release_llm_provider_closes_after_last_user(tmp_path):
+    """Test that a shared provider stays open until every user has released it"""
+    config = AgentConfig(llm_provider="openai", api_key="test-key", working_directory=tmp_path, rate_limit=7)
+
+    provider = create_llm_provider(config)
+    assert create_llm_provider(config) is provider
+
+    await release_llm_provider(provider)
+    assert not provider.is_closed()
+    await release_llm_provider(provider)
+    assert provider.is_closed()
+    assert create_llm_provider(config) is not provider
 
 
 @pytest.mark.asyncio
@@ -114,6 +146,61 @@ async def test_format_conversation_history(openai_provider):
     assert "No previous conversation history" in empty_formatted
 
 
+@pytest.mark.asyncio
+async def test_format_conversation_history_reuses_rendered_messages(openai_provider, task_state):
+    """Test that messages are rendered once and the oldest are dropped once the cache is full"""
+    for i in range(50):
+        task_state.add_message("user", f"message {i}")
+
+    first = format_conversation_history(openai_provider, task_state.messages)
+    assert first.splitlines()[0] == "user: message 0"
+    assert len(openai_provider._message_cache) == 50
+
+    oldest = task_state.messages[0]
+    task_state.add_message("assistant", "reply")
+    with patch("llm_agent.llm.openai._MESSAGE_CACHE_SIZE", 50):
+        second = format_conversation_history(openai_provider, task_state.messages)
+
+    assert second == "\n".join(first.splitlines()[1:] + ["assistant: reply"])
+    assert len(openai_provider._message_cache) == 50
+    assert id(oldest) not in openai_provider._message_cache
+
+
+@pytest.mark.asyncio
+async def test_format_prompt_keeps_cache_across_interleaved_states(openai_provider, mock_tool):
+    """Test that tasks sharing a provider don't evict each other's rendered history"""
+    openai_provider.register_tool(mock_tool)
+    states = [TaskState(), TaskState()]
+    for n, state in enumerate(states):
+        for i in range(30):
+            state.add_message("user", f"task {n} message {i}")
+            state.add_tool_result("mock_tool", ToolResult(success=True, message="ok"), {"i": i})
+
+    # Undo the module-level patch so the caching implementation is exercised
+    with patch.object(OpenAIProvider, "_format_conversation_history", format_conversation_history):
+        for _ in range(2):
+            for state in states:
+                await openai_provider.format_prompt("Test task", state, ["mock_tool"])
+
+    for state in states:
+        assert all(openai_provider._message_cache[id(msg)][0] is msg for msg in state.messages)
+        recent = state.get_recent_tools()
+        assert all(openai_provider._tool_entry_cache[id(te)][0] is te for te in recent)
+
+
+@pytest.mark.asyncio
+async def test_format_tool_execution_escapes_values(openai_provider, task_state):
+    """Test that markup in tool arguments and results is escaped in the prompt"""
+    result = ToolResult(success=True, message="Read <b> & more", data="if a < b:")
+    task_state.add_tool_result("read_file", result, {"path": "a&b.py"})
+
+    entry = openai_provider._format_tool_execution(task_state.tool_executions[-1])
+
+    assert "<path>a&amp;b.py</path>" in entry
+    assert "<message>Read &lt;b&gt; &amp; more</message>" in entry
+    assert "<data>if a &lt; b:</data>" in entry
+
+
 @pytest.mark.asyncio
 async def test_format_related_tasks(openai_provider):
     """Test formatting related tasks"""
@@ -198,6 +285,23 @@ async def test_format_prompt(openai_provider, task_state, mock_tool):
         openai_provider.format_prompt = original_format_prompt
 
 
+@pytest.mark.asyncio
+async def test_format_prompt_reuses_system_prompt(openai_provider, task_state, mock_tool):
+    """Test that the system prompt is rendered once per task and tool set"""
+    openai_provider.register_tool(mock_tool)
+
+    with patch("llm_agent.llm.openai.get_system_prompt", return_value="System prompt") as mock_get_system_prompt:
+        first = await openai_provider.format_prompt("Test task", task_state, ["mock_tool"])
+        second = await openai_provider.format_prompt("Test task", task_state, ["mock_tool"])
+        assert mock_get_system_prompt.call_count == 1
+
+        await openai_provider.format_prompt("Other task", task_state, ["mock_tool"])
+        assert mock_get_system_prompt.call_count == 2
+
+    assert first == second
+    assert first.startswith("System prompt")
+
+
 @pytest.mark.asyncio
 async def test_extract_response_xml(openai_provider):
     """Test XML extraction from response text"""
@@ -231,7 +335,7 @@ async def test_parse_args_xml(openai_provider):
 
 
 @pytest.mark.asyncio
-@patch('xml.etree.ElementTree.fromstring')
+@patch('llm_agent.llm.openai.ET.fromstring')
 async def test_parse_completion_response(mock_fromstring, openai_provider):
     """Test parsing a completion response with mocked XML parsing"""
     response = """<response>
@@ -285,7 +389,7 @@ async def test_parse_tool_response(openai_provider):
 </response>"""
 
     with patch.object(openai_provider, '_extract_response_xml', return_value=response[10:-11]):  # Remove <response> tags
-        with patch('xml.etree.ElementTree.fromstring') as mock_fromstring:
+        with patch('llm_agent.llm.openai.ET.fromstring') as mock_fromstring:
             # Create a mock XML structure
             mock_root = MagicMock()
             mock_thoughts = MagicMock()
@@ -327,7 +431,7 @@ async def test_parse_invalid_response(openai_provider):
     """Test parsing an invalid response"""
     # Test with invalid XML by raising an exception
     with patch.object(openai_provider, '_extract_response_xml', return_value="<unclosed>"):
-        with patch('xml.etree.ElementTree.fromstring', side_effect=ET.ParseError("Test parse error")):
+        with patch('llm_agent.llm.openai.ET.fromstring', side_effect=ET.ParseError("Test parse error")):
             action = await openai_provider.parse_response("<response><unclosed>")
             assert action.is_complete is False
             assert "Failed to parse response as XML" in action.thoughts
@@ -360,6 +464,9 @@ async def test_get_next_action(mock_get_system_prompt, openai_provider, task_sta
     
     mock_choice.message = mock_message
     mock_response.choices = [mock_choice]
+    mock_raw_response = MagicMock()
+    mock_raw_response.headers = {"x-ratelimit-remaining-requests": "9"}
+    mock_raw_response.parse.return_value = mock_response
 
     # Mock the parse_response method to avoid XML parsing issues
     openai_provider.parse_response = AsyncMock(return_value=LLMAction(
@@ -370,7 +477,9 @@ async def test_get_next_action(mock_get_system_prompt, openai_provider, task_sta
     ))
     
     # Mock the API call
-    with patch("openai.chat.completions.create", return_value=mock_response):
+    with patch.object(
+        openai_provider._client.chat.completions.with_raw_response, "create", AsyncMock(return_value=mock_raw_response)
+    ) as mock_create:
         # Mock the rate limiter so we don't actually wait
         openai_provider.rate_limiter.acquire = AsyncMock()
         
@@ -382,8 +491,178 @@ async def test_get_next_action(mock_get_system_prompt, openai_provider, task_sta
         assert action.tool_name == "mock_tool"
         assert action.tool_args == {"param1": "value1"}
         
-        # Verify rate limiter was called
+        # Verify rate limiter was called and the request was awaited
         assert openai_provider.rate_limiter.acquire.called
+        mock_create.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_get_next_action_limits_requests_in_flight(task_state, mock_tool):
+    """Test that concurrent calls never exceed the provider's request limit"""
+    provider = OpenAIProvider(api_key="test-key", rpm=100, max_concurrency=2)
+    provider.register_tool(mock_tool)
+    provider.rate_limiter.acquire = AsyncMock()
+
+    in_flight = 0
+    peak = 0
+
+    async def create(**kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        response = MagicMock()
+        response.headers = {}
+        response.parse().choices[0].message.content = "<response><thoughts>done</thoughts></response>"
+        return response
+
+    with patch.object(provider._client.chat.completions.with_raw_response, "create", create):
+        actions = await asyncio.gather(
+            *(provider.get_next_action("Test task", task_state, ["mock_tool"]) for _ in range(5))
+        )
+
+    assert all(action.thoughts == "done" for action in actions)
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_get_next_actions_keeps_request_order(openai_provider, task_state):
+    """Test that batched requests return one action per request, in order"""
+
+    async def get_next_action(task, state, available_tools):
+        await asyncio.sleep(0.01 if task == "first" else 0)
+        return LLMAction(thoughts=task)
+
+    openai_provider.get_next_action = get_next_action
+
+    actions = await openai_provider.get_next_actions([("first", task_state, []), ("second", task_state, [])])
+
+    assert [action.thoughts for action in actions] == ["first", "second"]
+
+
+@pytest.mark.asyncio
+async def test_get_next_actions_through_batch_api(task_state, mock_tool):
+    """Test that the Batch API path submits one job and maps results back by custom_id"""
+    provider = OpenAIProvider(api_key="test-key", use_batch_api=True)
+    provider.register_tool(mock_tool)
+
+    def result_line(custom_id, content):
+        body = {"choices": [{"message": {"content": content}}]}
+        return json.dumps({"custom_id": custom_id, "response": {"status_code": 200, "body": body}})
+
+    output = MagicMock()
+    output.text = "\n".join(
+        [
+            result_line("1", "<response><thoughts>second</thoughts></response>"),
+            result_line("0", "<response><thoughts>first</thoughts><is_complete>true</is_complete></response>"),
+        ]
+    )
+    running = MagicMock(status="in_progress")
+    completed = MagicMock(status="completed", output_file_id="file-out", error_file_id=None)
+
+    client = provider._client
+    with patch.object(client.files, "create", AsyncMock(return_value=MagicMock(id="file-in"))) as files_create, \
+            patch.object(client.batches, "create", AsyncMock(return_value=MagicMock(id="batch-1"))) as batches_create, \
+            patch.object(client.batches, "retrieve", AsyncMock(side_effect=[running, completed])), \
+            patch.object(client.files, "content", AsyncMock(return_value=output)), \
+            patch("llm_agent.llm.openai.asyncio.sleep", AsyncMock()):
+        actions = await provider.get_next_actions(
+            [("first task", task_state, ["mock_tool"]), ("second task", task_state, ["mock_tool"])]
+        )
+
+    lines = files_create.await_args.kwargs["file"][1].decode().splitlines()
+    assert [json.loads(line)["custom_id"] for line in lines] == ["0", "1"]
+    assert batches_create.await_args.kwargs["input_file_id"] == "file-in"
+    assert [action.thoughts for action in actions] == ["first", "second"]
+    assert actions[0].is_complete is True
+
+
+@pytest.mark.asyncio
+async def test_poll_batch_maps_errors_and_fills_gaps(openai_provider):
+    """Test that failed requests come from the error file and missing ones still get an action"""
+    output = MagicMock()
+    output.text = json.dumps(
+        {
+            "custom_id": "0",
+            "response": {
+                "status_code": 200,
+                "body": {"choices": [{"message": {"content": "<response><thoughts>ok</thoughts></response>"}}]},
+            },
+        }
+    )
+    errors = MagicMock()
+    errors.text = json.dumps({"custom_id": "2", "response": {"status_code": 500, "body": {"error": "server error"}}})
+    batch = MagicMock(status="completed", output_file_id="file-out", error_file_id="file-err")
+
+    client = openai_provider._client
+    contents = {"file-out": output, "file-err": errors}
+    with patch.object(client.batches, "retrieve", AsyncMock(return_value=batch)), \
+            patch.object(client.files, "content", AsyncMock(side_effect=lambda file_id: contents[file_id])):
+        actions = await openai_provider.poll_batch("batch-1", 4)
+
+    assert len(actions) == 4
+    assert actions[0].thoughts == "ok"
+    assert "ended with status completed" in actions[1].thoughts
+    assert "server error" in actions[2].thoughts
+    assert "ended with status completed" in actions[3].thoughts
+
+
+@pytest.mark.asyncio
+async def test_poll_batch_skips_malformed_result_lines(openai_provider):
+    """Test that a result line that can't be parsed only leaves its own prompt unanswered"""
+    good = {
+        "custom_id": "1",
+        "response": {
+            "status_code": 200,
+            "body": {"choices": [{"message": {"content": "<response><thoughts>ok</thoughts></response>"}}]},
+        },
+    }
+    output = MagicMock()
+    output.text = "\n".join(
+        ["{not json", json.dumps({"custom_id": "0", "response": {"status_code": 200, "body": {}}}), json.dumps(good)]
+    )
+    batch = MagicMock(status="completed", output_file_id="file-out", error_file_id=None)
+
+    client = openai_provider._client
+    with patch.object(client.batches, "retrieve", AsyncMock(return_value=batch)), \
+            patch.object(client.files, "content", AsyncMock(return_value=output)):
+        actions = await openai_provider.poll_batch("batch-1", 2)
+
+    assert "ended with status completed" in actions[0].thoughts
+    assert actions[1].thoughts == "ok"
+
+
+@pytest.mark.asyncio
+async def test_poll_batch_reports_polling_errors(openai_provider):
+    """Test that a failed status check answers every prompt with an error action"""
+    client = openai_provider._client
+    with patch.object(client.batches, "retrieve", AsyncMock(side_effect=ConnectionError("network down"))):
+        actions = await openai_provider.poll_batch("batch-1", 3)
+
+    assert len(actions) == 3
+    assert all("network down" in action.thoughts for action in actions)
+
+
+@pytest.mark.asyncio
+async def test_get_next_action_backs_off_when_throttled(task_state, mock_tool):
+    """Test that a 429 shrinks the concurrency limit and pauses the rate limiter"""
+    import openai
+
+    provider = OpenAIProvider(api_key="test-key", rpm=100, max_concurrency=8)
+    provider.register_tool(mock_tool)
+    provider.rate_limiter.acquire = AsyncMock()
+
+    response = MagicMock(status_code=429, headers={"retry-after": "2"})
+    error = openai.RateLimitError("Too many requests", response=response, body=None)
+
+    with patch.object(provider._client.chat.completions.with_raw_response, "create", AsyncMock(side_effect=error)):
+        action = await provider.get_next_action("Test task", task_state, ["mock_tool"])
+
+    assert "Error in OpenAI API call" in action.thoughts
+    assert provider._concurrency.limit == 4
+    assert provider._concurrency.in_flight == 0
+    assert 1 < provider.rate_limiter.get_wait_time() <= 2
 
 
 @pytest.mark.asyncio
@@ -397,7 +676,11 @@ async def test_get_next_action_error(mock_get_system_prompt, openai_provider, ta
     mock_get_system_prompt.return_value = "Mocked system prompt"
     
     # Test API error
-    with patch("openai.chat.completions.create", side_effect=Exception("API error")):
+    with patch.object(
+        openai_provider._client.chat.completions.with_raw_response,
+        "create",
+        AsyncMock(side_effect=Exception("API error")),
+    ):
         openai_provider.rate_limiter.acquire = AsyncMock()
         
         action = await openai_provider.get_next_action("Test task", task_state, ["mock_tool"])
@@ -432,4 +715,126 @@ async def test_rate_limiter():
     
     # Now should be at limit
     assert rate_limiter.get_current_rpm() == 100
-    assert rate_limiter.get_wait_time() > 0 
\ No newline at end of file
+    assert rate_limiter.get_wait_time() > 0 
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_waits_for_oldest_request_to_expire():
+    """Test that a full window blocks until its oldest request leaves it"""
+    rate_limiter = RateLimiter(rpm=2)
+    now = time.time()
+    # Oldest request expires in a few milliseconds
+    rate_limiter.requests.extend([now - 59.98, now])
+
+    await asyncio.wait_for(rate_limiter.acquire(), timeout=1)
+
+    assert rate_limiter.get_current_rpm() == 2
+
+@pytest.mark.asyncio
+async def test_cached_provider_reuses_actions(task_state):
+    """Test that identical prompts are answered from the cache"""
+    inner = AsyncMock()
+    inner.format_prompt.side_effect = lambda task, state, tools: f"{task}|{len(state.messages)}"
+    inner.get_next_action.return_value = LLMAction(thoughts="Use tool", tool_name="mock_tool", tool_args={"a": "1"})
+    provider = CachedLLMProvider(inner, max_size=1)
+
+    first = await provider.get_next_action("task", task_state, ["mock_tool"])
+    second = await provider.get_next_action("task", task_state, ["mock_tool"])
+    assert first == second
+    assert inner.get_next_action.call_count == 1
+    assert provider.cache_len() == 1
+
+    # A different prompt misses and evicts the older entry
+    task_state.add_message("user", "hello")
+    await provider.get_next_action("task", task_state, ["mock_tool"])
+    assert inner.get_next_action.call_count == 2
+    assert provider.cache_len() == 1
+
+    # Error responses are not cached
+    inner.get_next_action.return_value = LLMAction(thoughts="Error in OpenAI API call: boom")
+    await provider.get_next_action("other", task_state, ["mock_tool"])
+    assert provider.cache_len() == 1
+
+    # Grouped tool calls are actionable and are cached
+    inner.get_next_action.return_value = LLMAction(tool_calls=[ToolCall(name="mock_tool", args={})])
+    await provider.get_next_action("grouped", task_state, ["mock_tool"])
+    await provider.get_next_action("grouped", task_state, ["mock_tool"])
+    assert inner.get_next_action.call_count == 4
+
+    provider.clear_cache()
+    assert provider.cache_len() == 0
+
+
+@pytest.mark.asyncio
+async def test_cached_provider_batches_only_misses(task_state):
+    """Test that get_next_actions forwards cache misses to the wrapped provider as one batch"""
+    inner = AsyncMock()
+    inner.format_prompt.side_effect = lambda task, state, tools: task
+    inner.get_next_action.return_value = LLMAction(is_complete=True, thoughts="cached")
+    inner.get_next_actions.side_effect = lambda requests: [
+        LLMAction(is_complete=True, thoughts=task) for task, _, _ in requests
+    ]
+    provider = CachedLLMProvider(inner)
+    await provider.get_next_action("a", task_state, [])
+
+    actions = await provider.get_next_actions([("a", task_state, []), ("b", task_state, []), ("c", task_state, [])])
+
+    assert [action.thoughts for action in actions] == ["cached", "b", "c"]
+    assert [task for task, _, _ in inner.get_next_actions.await_args.args[0]] == ["b", "c"]
+    assert provider.cache_len() == 3
+
+@pytest.mark.asyncio
+async def test_parse_multiple_tool_calls(openai_provider):
+    """Test parsing a response that groups several tool calls"""
+    response = """<response>
+<thoughts>Read both files</thoughts>
+<tool_calls>
+<call><tool>read_file</tool><args><path>a.py</path></args></call>
+<call><tool>read_file</tool><args><path>b.py</path></args></call>
+</tool_calls>
+<is_complete>false</is_complete>
+</response>"""
+
+    action = await openai_provider.parse_response(response)
+    assert action.tool_name is None
+    assert [(c.name, c.args) for c in action.get_tool_calls()] == [
+        ("read_file", {"path": "a.py"}),
+        ("read_file", {"path": "b.py"}),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_parse_tool_calls_skips_empty_tool(openai_provider):
+    """Test that grouped calls without a tool name are dropped"""
+    response = """<response>
+<thoughts>Read a file</thoughts>
+<tool_calls>
+<call><tool/><args><path>a.py</path></args></call>
+<call><tool>read_file</tool><args><path>b.py</path></args></call>
+</tool_calls>
+<is_complete>false</is_complete>
+</response>"""
+
+    action = await openai_provider.parse_response(response)
+    assert [(c.name, c.args) for c in action.get_tool_calls()] == [("read_file", {"path": "b.py"})]
+
+
+@pytest.mark.asyncio
+async def test_parse_response_with_lxml(openai_provider):
+    """Test parsing on the lxml path, including input it can't recover anything from"""
+    pytest.importorskip("lxml")
+    import llm_agent.llm.openai as openai_module
+
+    if openai_module._XML_PARSER is None:
+        pytest.skip("lxml was not picked up by the provider")
+
+    # Recovery mode tolerates a stray ampersand the model forgot to escape
+    action = await openai_provider.parse_response(
+        "<response><thoughts>Use a & b</thoughts><is_complete>true</is_complete><r>done</r></response>"
+    )
+    assert action.is_complete is True
+    assert action.result == "done"
+
+    with patch.object(openai_module.ET, "fromstring", return_value=None):
+        action = await openai_provider.parse_response("<response><thoughts>x</thoughts></response>")
+    assert action.thoughts.startswith("Failed to parse response as XML")
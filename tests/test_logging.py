@@ -0,0 +1,42 @@
+"""
+Tests for the agent loggers
+"""
+
+import logging
+
+from llm_agent.logging import LogConfig, get_agent_logger
+
+
+def log_config(path) -> LogConfig:
+    return LogConfig(file_path=path, console_logging=False, level="INFO")
+
+
+def test_loggers_with_the_same_name_keep_their_own_handlers(temp_dir):
+    """Test that a second logger of the same name doesn't take over the first one's log file"""
+    first = get_agent_logger("agent", log_config(temp_dir / "first.log"))
+    second = get_agent_logger("agent", log_config(temp_dir / "second.log"))
+    assert first is not second
+    assert get_agent_logger("agent", log_config(temp_dir / "first.log")) is first
+
+    first.info("to first")
+    second.emit_batch([(logging.INFO, "to second", {}), (logging.DEBUG, "filtered", {})])
+    first.close()
+    second.close()
+
+    assert "to first" in (temp_dir / "first.log").read_text()
+    second_log = (temp_dir / "second.log").read_text()
+    assert "to second" in second_log
+    assert "to first" not in second_log
+    assert "filtered" not in second_log
+
+
+def test_agent_records_propagate_to_application_handlers(temp_dir, caplog):
+    """Test that agent records still reach handlers configured above the agent logger"""
+    logger = get_agent_logger("agent", log_config(temp_dir / "propagate.log"))
+
+    with caplog.at_level(logging.INFO):
+        logger.info("visible to the application")
+        logger.emit_batch([(logging.WARNING, "batched", {})])
+    logger.close()
+
+    assert [record.getMessage() for record in caplog.records] == ["visible to the application", "batched"]
@@ -5,7 +5,7 @@ Tests for prompt generation and formatting
 from pathlib import Path
 import pytest
 
-from llm_agent.llm.prompts import get_system_prompt
+from llm_agent.llm.prompts import format_tool_doc, get_system_prompt
 from llm_agent.tools.base import BaseTool, ToolResult
 
 
@@ -192,4 +192,22 @@ def test_get_system_prompt_empty_tools():
     assert "Available Tools" in prompt
     
     # Verify no tool-specific sections
-    assert "# Available Tools\n\n" in prompt or "# Available Tools\n" in prompt 
\ No newline at end of file
+    assert "# Available Tools\n\n" in prompt or "# Available Tools\n" in prompt 
+
+def test_get_system_prompt_with_prerendered_tool_docs(simple_tool, complex_tool):
+    """Test that pre-rendered tool docs produce the same prompt"""
+    tools = [simple_tool, complex_tool]
+    working_dir = str(Path.cwd())
+
+    prompt = get_system_prompt("Test task", tools, working_dir)
+    cached = get_system_prompt("Test task", tools, working_dir, tool_docs=[format_tool_doc(t) for t in tools])
+
+    assert cached == prompt
+
+
+def test_get_system_prompt_documents_tool_calls(simple_tool):
+    """Test that the response format documents grouped tool calls"""
+    prompt = get_system_prompt("Test task", [simple_tool], str(Path.cwd()))
+
+    assert "<tool_calls>" in prompt
+    assert "<call>" in prompt
@@ -4,11 +4,12 @@ Tests for the Rate Limiter component
 
 import asyncio
 import time
+from collections import deque
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from llm_agent.llm.rate_limiter import RateLimiter
+from llm_agent.llm.rate_limiter import AdaptiveConcurrencyLimiter, RateLimiter
 from llm_agent.logging import AgentLogger
 
 
@@ -31,7 +32,7 @@ async def test_initialization():
     # Basic initialization
     rate_limiter = RateLimiter(rpm=10)
     assert rate_limiter.rpm == 10
-    assert rate_limiter.requests == []
+    assert rate_limiter.requests == deque()
     assert rate_limiter.logger is None
 
     # Initialization with logger
@@ -47,7 +48,7 @@ async def test_get_metrics(rate_limiter):
     """Test getting rate limiter metrics"""
     # Add some requests
     now = time.time()
-    rate_limiter.requests = [now - 70, now - 30, now - 20, now - 10]  # First one is outside the window
+    rate_limiter.requests = deque([now - 70, now - 30, now - 20, now - 10])  # First one is outside the window
     
     metrics = rate_limiter._get_metrics()
     
@@ -72,13 +73,13 @@ async def test_get_current_rpm(rate_limiter):
     
     # Add requests at different times
     now = time.time()
-    rate_limiter.requests = [
+    rate_limiter.requests = deque([
         now - 120,  # 2 minutes ago (outside window)
         now - 70,   # 70 seconds ago (outside window)
         now - 50,   # 50 seconds ago (inside window)
         now - 30,   # 30 seconds ago (inside window)
         now - 10    # 10 seconds ago (inside window)
-    ]
+    ])
     
     assert rate_limiter.get_current_rpm() == 3
 
@@ -91,12 +92,12 @@ async def test_get_wait_time(rate_limiter):
     
     # Add requests but stay under limit
     now = time.time()
-    rate_limiter.requests = [now - 10, now - 5]
+    rate_limiter.requests = deque([now - 10, now - 5])
     assert rate_limiter.get_wait_time() == 0
     
     # Add more to reach limit
     rate_limiter.rpm = 3  # Lower the limit to make testing easier
-    rate_limiter.requests = [now - 50, now - 40, now - 30]
+    rate_limiter.requests = deque([now - 50, now - 40, now - 30])
     
     # The oldest request (now - 50) will expire in 10 seconds,
     # so wait time should be approximately 10
@@ -122,7 +123,7 @@ async def test_acquire_expired_cleanup(rate_limiter):
     """Test that expired requests are cleaned up during acquire"""
     # Add some expired requests
     now = time.time()
-    rate_limiter.requests = [now - 70, now - 65]  # Both outside 60-second window
+    rate_limiter.requests = deque([now - 70, now - 65])  # Both outside 60-second window
     
     # Acquire should clean these up
     await rate_limiter.acquire()
@@ -143,11 +144,11 @@ async def _test_acquire_at_limit():
     
     # These timestamps will make the oldest one expire soon
     # Instead of just at window boundary like before
-    rate_limiter.requests = [
+    rate_limiter.requests = deque([
         now - 59,  # Will expire in 1 second
         now - 30,
         now
-    ]
+    ])
     
     # Directly patch asyncio.sleep to avoid waiting
     with patch("asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
@@ -177,6 +178,49 @@ async def _test_acquire_at_limit():
         rate_limiter.get_current_rpm = original_get_current_rpm
 
 
+@pytest.mark.asyncio
+async def test_observe_pauses_on_server_headers(rate_limiter):
+    """Test that retry-after and exhausted quota headers delay the next slot"""
+    rate_limiter.observe({"x-ratelimit-remaining-requests": "5", "x-ratelimit-reset-requests": "6m0s"})
+    assert rate_limiter.get_wait_time() == 0
+
+    rate_limiter.observe({"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "1m30s"})
+    assert 89 < rate_limiter.get_wait_time() <= 90
+
+    rate_limiter.blocked_until = 0.0
+    rate_limiter.observe({"retry-after": "20ms"})
+    start_time = time.time()
+    await rate_limiter.acquire()
+    assert time.time() - start_time >= 0.01
+    assert len(rate_limiter.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_adaptive_concurrency_limiter():
+    """Test additive increase and multiplicative decrease of the concurrency limit"""
+    limiter = AdaptiveConcurrencyLimiter(max_limit=4)
+
+    for _ in range(4):
+        await limiter.acquire()
+    assert limiter.in_flight == 4
+
+    # A fifth request waits until one finishes
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    await limiter.release(congested=True)
+    assert limiter.limit == 2
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    await limiter.release()
+    await limiter.release()
+    await asyncio.wait_for(waiter, timeout=1)
+    assert limiter.limit == 3
+    assert limiter.in_flight == 2
+
+
 @pytest.mark.asyncio
 async def test_acquire_with_logging(mock_logger):
     """Test acquire with logging"""
@@ -190,7 +234,7 @@ async def test_acquire_with_logging(mock_logger):
     
     # Add some expired requests
     now = time.time()
-    rate_limiter.requests = [now - 70, now - 65, now - 10]
+    rate_limiter.requests = deque([now - 70, now - 65, now - 10])
     
     # Reset mock to start fresh
     mock_logger.reset_mock()
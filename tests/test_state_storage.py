@@ -0,0 +1,103 @@
+"""
+Tests for the state storage backends
+"""
+
+from datetime import datetime
+
+import pytest
+
+from llm_agent.state.storage import JsonStateStorage, SqliteStateStorage
+
+
+class SqliteStorage(SqliteStateStorage):
+    """SQLite storage with the checkpoint API stubbed out"""
+
+    def create_checkpoint(self, task_id, description):
+        raise NotImplementedError
+
+    def restore_checkpoint(self, checkpoint_id):
+        raise NotImplementedError
+
+    def list_checkpoints(self, task_id):
+        return []
+
+
+def message(content: str) -> dict:
+    return {"role": "user", "content": content, "timestamp": datetime.utcnow(), "metadata": {}}
+
+
+@pytest.fixture
+def sqlite_storage(temp_dir):
+    """Create a SQLite storage in a temporary directory"""
+    return SqliteStorage(temp_dir / "state.db")
+
+
+@pytest.fixture
+def json_storage(temp_dir):
+    """Create a JSON storage in a temporary directory that closes its event logs"""
+    storage = JsonStateStorage(temp_dir)
+    yield storage
+    storage.close()
+
+
+def test_sqlite_append_events_inserts_only_new_messages(sqlite_storage):
+    """Test that appending events adds each message row once"""
+    sqlite_storage.save_state("task", {"task": "Test task", "messages": [message("first")], "context": {}})
+
+    for i in range(2, 7):
+        sqlite_storage.append_events(
+            "task",
+            [
+                {"type": "message", "data": message(f"message {i}")},
+                {"type": "context", "data": {"step": i}},
+                {"type": "user_input", "data": f"input {i}"},
+            ],
+        )
+
+    state = sqlite_storage.load_state("task")
+    assert [msg["content"] for msg in state["messages"]] == ["first"] + [f"message {i}" for i in range(2, 7)]
+    assert state["context"] == {"step": 6}
+    assert state["user_inputs"] == [f"input {i}" for i in range(2, 7)]
+    assert state["task"] == "Test task"
+
+
+def test_sqlite_save_state_replaces_messages(sqlite_storage):
+    """Test that saving a full state twice does not duplicate its messages"""
+    state = {"messages": [message("first"), message("second")], "context": {"key": "value"}}
+    sqlite_storage.save_state("task", state)
+    sqlite_storage.save_state("task", sqlite_storage.load_state("task"))
+
+    loaded = sqlite_storage.load_state("task")
+    assert [msg["content"] for msg in loaded["messages"]] == ["first", "second"]
+    assert loaded["context"] == {"key": "value"}
+
+
+def test_json_append_events_compacts_large_event_log(json_storage, monkeypatch):
+    """Test that an event log past the threshold is folded into the snapshot"""
+    monkeypatch.setattr(json_storage, "COMPACT_THRESHOLD", 512)
+    json_storage.save_state("task", {"task": "Test task", "messages": [message("first")], "context": {}})
+    events_path = json_storage.state_path / "task_events.jsonl"
+
+    json_storage.append_events("task", [{"type": "message", "data": message("second")}])
+    assert events_path.exists()
+
+    for i in range(3, 13):
+        json_storage.append_events(
+            "task",
+            [
+                {"type": "message", "data": message(f"message {i}")},
+                {"type": "context", "data": {"step": i}},
+            ],
+        )
+        assert not events_path.exists() or events_path.stat().st_size <= 512
+
+    # Events written before the last compaction now live in the snapshot
+    assert "message 3" in (json_storage.state_path / "task_messages.json").read_text()
+
+    expected = ["first", "second"] + [f"message {i}" for i in range(3, 13)]
+    for storage in (json_storage, JsonStateStorage(json_storage.base_path)):
+        state = storage.load_state("task")
+        assert [msg["content"] for msg in state["messages"]] == expected
+        assert state["context"] == {"step": 12}
+        assert state["task"] == "Test task"
+        assert isinstance(state["messages"][0]["timestamp"], datetime)